@@ -0,0 +1,23 @@
+"""
+Shared pytest fixtures for the LLM data extraction tests.
+
+Author: LLM Data Extraction
+Date: 2025-11-26
+"""
+
+import pytest
+
+from validator import DataValidator
+from data_extractor import TraditionalExtractor
+
+
+@pytest.fixture(scope='session')
+def validator():
+    """One DataValidator for the whole suite (stateless, reentrant)."""
+    return DataValidator()
+
+
+@pytest.fixture(scope='session')
+def traditional_extractor():
+    """One TraditionalExtractor for the whole suite."""
+    return TraditionalExtractor()
@@ -7,15 +7,22 @@ Author: LLM Data Extraction
 Date: 2025-11-26
 """
 
+import asyncio
+import hashlib
+import io
 import json
 import logging
 import os
-from typing import Dict, Optional
+import time
+from pathlib import Path
+
+import orjson
+from typing import Dict, List, Optional
 from datetime import datetime
 
 # OpenAI import with error handling
 try:
-    from openai import OpenAI
+    from openai import OpenAI, AsyncOpenAI
     OPENAI_AVAILABLE = True
 except ImportError:
     OPENAI_AVAILABLE = False
@@ -32,6 +39,105 @@ load_dotenv()
 # logging.basicConfig() is handled in main.py
 logger = logging.getLogger(__name__)
 
+# Incremental decoder for replies that wrap the JSON in prose
+_JSON_DECODER = json.JSONDecoder()
+
+# Schema enforced server-side via Structured Outputs, so the reply is
+# guaranteed to be a conforming JSON object - no carve-and-reparse and no
+# validation-failure retry round-trips
+_EXTRACTION_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'company_name': {'type': ['string', 'null']},
+        'document_date': {'type': ['string', 'null']},
+        'total_amount': {'type': ['number', 'null']},
+        'currency': {'type': ['string', 'null']},
+        'category': {'type': ['string', 'null']},
+        'line_items': {
+            'type': ['array', 'null'],
+            'items': {
+                'type': 'object',
+                'properties': {
+                    'description': {'type': 'string'},
+                    'amount': {'type': 'number'},
+                },
+                'required': ['description', 'amount'],
+                'additionalProperties': False,
+            },
+        },
+        # Strict mode requires every object to be a closed shape, so the
+        # free-form metrics mapping is expressed as name/value pairs and
+        # folded back into a dict when the response is parsed
+        'additional_metrics': {
+            'type': ['array', 'null'],
+            'items': {
+                'type': 'object',
+                'properties': {
+                    'name': {'type': 'string'},
+                    'value': {'type': ['number', 'string']},
+                },
+                'required': ['name', 'value'],
+                'additionalProperties': False,
+            },
+        },
+    },
+    'required': [
+        'company_name', 'document_date', 'total_amount', 'currency',
+        'category', 'line_items', 'additional_metrics',
+    ],
+    'additionalProperties': False,
+}
+
+_RESPONSE_FORMAT = {
+    'type': 'json_schema',
+    'json_schema': {'name': 'extraction', 'schema': _EXTRACTION_SCHEMA, 'strict': True},
+}
+
+
+def _fold_additional_metrics(data: Dict) -> Dict:
+    """
+    Convert schema-shaped additional_metrics back to a plain dict.
+
+    The strict schema delivers the metrics as [{'name': ..., 'value': ...}]
+    pairs; downstream code (normalizer, validator, mocks) works with a
+    mapping, so fold the pairs back here. Dict-shaped metrics (mock mode,
+    older replies) pass through untouched.
+    """
+    metrics = data.get('additional_metrics') if isinstance(data, dict) else None
+    if isinstance(metrics, list):
+        data['additional_metrics'] = {
+            pair['name']: pair['value']
+            for pair in metrics
+            if isinstance(pair, dict) and 'name' in pair
+        }
+    return data
+
+# Static prompt boilerplate built once at import; per document only the
+# text is substituted in
+_EXTRACTION_PROMPT_TEMPLATE = """You are a financial data extraction expert. Extract structured information from the following document.
+
+DOCUMENT:
+{document}
+
+INSTRUCTIONS:
+Extract the following information and return it as a JSON object:
+- company_name: The name of the company (from invoice, report, etc.)
+- document_date: The date of the document (not today's date)
+- total_amount: The main total amount (as a number, without currency symbols)
+- currency: The currency code or symbol used
+- category: Whether this is an "expense" or "income" document
+- line_items: If applicable, list of individual items with descriptions and amounts
+- additional_metrics: A list of name/value pairs for any other relevant financial metrics (revenue, profit, expenses, etc.)
+
+IMPORTANT:
+- Return ONLY valid JSON, no additional text
+- Use null for missing values
+- Extract amounts as numbers without currency symbols
+- Be precise with the document date (not the current date)
+- For reports with multiple amounts, extract all relevant metrics in additional_metrics
+
+JSON OUTPUT:"""
+
 
 class LLMDataExtractor:
     """
@@ -56,6 +162,12 @@ class LLMDataExtractor:
         self.model = model
         self.use_mock = use_mock or os.getenv('USE_MOCK', 'false').lower() == 'true'
         self.validator = DataValidator()
+
+        # Disk cache of raw LLM responses keyed by content hash, so re-runs
+        # over unchanged documents skip the API entirely (set USE_CACHE=false
+        # to disable)
+        self.use_cache = os.getenv('USE_CACHE', 'true').lower() == 'true'
+        self._cache_dir = Path('.llm_cache')
         
         # Initialize OpenAI client if not in mock mode
         if not self.use_mock:
@@ -67,36 +179,238 @@ class LLMDataExtractor:
                 raise ValueError("OpenAI API key not provided. Set OPENAI_API_KEY environment variable or pass api_key parameter.")
             
             self.client = OpenAI(api_key=self.api_key)
-            logger.info(f"Initialized LLMDataExtractor with model: {self.model}")
+            self.async_client = AsyncOpenAI(api_key=self.api_key)
+            logger.info("Initialized LLMDataExtractor with model: %s", self.model)
         else:
             self.client = None
+            self.async_client = None
             logger.info("Initialized LLMDataExtractor in MOCK mode")
     
-    def extract_from_document(self, document_text: str, document_name: str = "document") -> Dict:
+    def extract_from_document(self, document_text: str, document_name: str = "document",
+                              extracted_at: Optional[str] = None) -> Dict:
         """
         Extract structured data from document text.
-        
+
         Args:
             document_text: Raw document text
             document_name: Name of the document (for logging)
-            
+            extracted_at: Timestamp to record; defaults to now. Batch paths
+                pass one shared timestamp instead of re-reading the clock
+                per document.
+
         Returns:
             Dictionary with extracted and normalized data
         """
-        logger.info(f"Extracting data from: {document_name}")
+        logger.info("Extracting data from: %s", document_name)
         
         # Get raw extraction (from LLM or mock)
         if self.use_mock:
             raw_extraction = self._get_mock_response(document_text, document_name)
         else:
-            raw_extraction = self._extract_with_llm(document_text)
-        
+            raw_extraction = self._cache_lookup(document_text)
+            if raw_extraction is None:
+                raw_extraction = self._extract_with_llm(document_text)
+                self._cache_store(document_text, raw_extraction)
+
+        return self._finish_extraction(raw_extraction, document_name, extracted_at)
+
+    def _cache_key(self, document_text: str) -> Path:
+        """Cache file path for a document (hash of model + content)."""
+        digest = hashlib.sha256((self.model + document_text).encode()).hexdigest()
+        return self._cache_dir / f"{digest}.json"
+
+    def _cache_lookup(self, document_text: str) -> Optional[Dict]:
+        """Return the cached raw extraction for a document, or None."""
+        if not self.use_cache:
+            return None
+        cache_path = self._cache_key(document_text)
+        if cache_path.exists():
+            try:
+                raw_extraction = json.loads(cache_path.read_text(encoding='utf-8'))
+                logger.info("Using cached LLM response (%s)", cache_path.name)
+                return raw_extraction
+            except (OSError, json.JSONDecodeError) as e:
+                logger.warning("Ignoring unreadable cache entry %s: %s", cache_path, e)
+        return None
+
+    def _cache_store(self, document_text: str, raw_extraction: Dict):
+        """Persist a raw extraction to the disk cache (atomic write)."""
+        if not self.use_cache:
+            return
+        try:
+            self._cache_dir.mkdir(exist_ok=True)
+            cache_path = self._cache_key(document_text)
+            tmp_path = cache_path.with_suffix('.tmp')
+            tmp_path.write_text(json.dumps(raw_extraction, ensure_ascii=False), encoding='utf-8')
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            logger.warning("Could not write LLM cache entry: %s", e)
+
+    async def extract_from_document_async(self, document_text: str, document_name: str = "document",
+                                          extracted_at: Optional[str] = None) -> Dict:
+        """
+        Async variant of extract_from_document.
+
+        Used by extract_documents_concurrently to overlap OpenAI HTTP
+        latency across documents; normalization and validation are the
+        same as in the sync path.
+
+        Args:
+            document_text: Raw document text
+            document_name: Name of the document (for logging)
+            extracted_at: Timestamp to record; defaults to now
+
+        Returns:
+            Dictionary with extracted and normalized data
+        """
+        logger.info("Extracting data from: %s", document_name)
+
+        if self.use_mock:
+            raw_extraction = self._get_mock_response(document_text, document_name)
+        else:
+            raw_extraction = self._cache_lookup(document_text)
+            if raw_extraction is None:
+                raw_extraction = await self._extract_with_llm_async(document_text)
+                self._cache_store(document_text, raw_extraction)
+
+        return self._finish_extraction(raw_extraction, document_name, extracted_at)
+
+    async def extract_documents_concurrently(self, documents: List[tuple],
+                                             max_concurrency: int = 20) -> List:
+        """
+        Extract from many documents with concurrent API calls.
+
+        Each call mostly waits on OpenAI HTTP latency, so fanning out with
+        asyncio.gather gives a near-linear speedup in document count. A
+        semaphore bounds in-flight requests to stay under rate limits.
+
+        Args:
+            documents: List of (document_text, document_name) tuples
+            max_concurrency: Maximum number of in-flight API requests
+
+        Returns:
+            List of extraction results in input order; a failed document
+            yields the exception object instead of a result dict
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        # One timestamp for the whole fan-out - per-document clock reads
+        # just serialize through the GIL for no informational gain
+        batch_ts = datetime.now().isoformat()
+
+        async def extract_one(document_text: str, document_name: str):
+            async with semaphore:
+                return await self.extract_from_document_async(document_text, document_name, batch_ts)
+
+        tasks = [extract_one(text, name) for text, name in documents]
+        return await asyncio.gather(*tasks, return_exceptions=True)
+
+    def extract_batch(self, documents: List[tuple], poll_interval: int = 30) -> List[Dict]:
+        """
+        Extract from many documents via the OpenAI Batch API.
+
+        Intended for offline runs (nightly pipelines) where latency does not
+        matter: batched requests cost about half as much as interactive ones
+        and the server packs them for throughput. The call blocks while
+        polling until the batch completes.
+
+        Args:
+            documents: List of (document_text, document_name) tuples
+            poll_interval: Seconds between batch status polls
+
+        Returns:
+            List of extraction results in input order; documents missing
+            from the batch output yield None
+        """
+        batch_ts = datetime.now().isoformat()
+
+        if self.use_mock:
+            # No batch endpoint in mock mode - just extract sequentially
+            return [self.extract_from_document(text, name, batch_ts) for text, name in documents]
+
+        # One chat-completion request per document, keyed by position
+        lines = []
+        for i, (document_text, _) in enumerate(documents):
+            request = {
+                'custom_id': f'doc-{i}',
+                'method': 'POST',
+                'url': '/v1/chat/completions',
+                'body': {
+                    'model': self.model,
+                    'messages': [
+                        {"role": "system", "content": "You are a financial data extraction expert. Always return valid JSON."},
+                        {"role": "user", "content": self._build_extraction_prompt(document_text)}
+                    ],
+                    'temperature': 0.1,
+                    'max_tokens': 1000,
+                    'response_format': _RESPONSE_FORMAT
+                }
+            }
+            lines.append(json.dumps(request))
+
+        batch_file = self.client.files.create(
+            file=io.BytesIO('\n'.join(lines).encode('utf-8')),
+            purpose='batch'
+        )
+        batch = self.client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint='/v1/chat/completions',
+            completion_window='24h'
+        )
+        logger.info("Submitted batch %s with %s documents", batch.id, len(documents))
+
+        # Poll until the batch reaches a terminal state
+        while batch.status not in ('completed', 'failed', 'expired', 'cancelled'):
+            time.sleep(poll_interval)
+            batch = self.client.batches.retrieve(batch.id)
+            logger.info("Batch %s status: %s", batch.id, batch.status)
+
+        if batch.status != 'completed':
+            raise RuntimeError(f"Batch {batch.id} finished with status '{batch.status}'")
+
+        # Map responses back to documents by custom_id
+        output_text = self.client.files.content(batch.output_file_id).text
+        raw_by_id = {}
+        for line in output_text.splitlines():
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            try:
+                response_text = entry['response']['body']['choices'][0]['message']['content'].strip()
+                raw_by_id[entry['custom_id']] = self._parse_llm_response(response_text)
+            except (KeyError, ValueError) as e:
+                logger.error("Bad batch response for %s: %s", entry.get('custom_id'), e)
+
+        results = []
+        for i, (_, document_name) in enumerate(documents):
+            raw_extraction = raw_by_id.get(f'doc-{i}')
+            if raw_extraction is None:
+                logger.error("No batch result for %s", document_name)
+                results.append(None)
+            else:
+                results.append(self._finish_extraction(raw_extraction, document_name, batch_ts))
+
+        return results
+
+    def _finish_extraction(self, raw_extraction: Dict, document_name: str,
+                           extracted_at: Optional[str] = None) -> Dict:
+        """
+        Normalize, validate and package a raw extraction.
+
+        Args:
+            raw_extraction: Raw extracted data from LLM or mock
+            document_name: Name of the document (for logging)
+            extracted_at: Timestamp to record; defaults to now
+
+        Returns:
+            Dictionary with extracted and normalized data
+        """
         # Normalize the extracted data
         normalized_data = normalize_extraction(raw_extraction)
-        
+
         # Validate the normalized data
         is_valid, errors = self.validator.validate_extraction(normalized_data)
-        
+
         # Build result
         result = {
             'source_document': document_name,
@@ -107,16 +421,16 @@ class LLMDataExtractor:
                 'is_valid': is_valid,
                 'errors': errors
             },
-            'extracted_at': datetime.now().isoformat()
+            'extracted_at': extracted_at or datetime.now().isoformat()
         }
-        
+
         if not is_valid:
-            logger.warning(f"Validation errors for {document_name}: {errors}")
+            logger.warning("Validation errors for %s: %s", document_name, errors)
         else:
-            logger.info(f"Successfully extracted and validated data from {document_name}")
-        
+            logger.info("Successfully extracted and validated data from %s", document_name)
+
         return result
-    
+
     def _build_extraction_prompt(self, document_text: str) -> str:
         """
         Build the prompt for LLM extraction.
@@ -127,31 +441,7 @@ class LLMDataExtractor:
         Returns:
             Formatted prompt string
         """
-        prompt = f"""You are a financial data extraction expert. Extract structured information from the following document.
-
-DOCUMENT:
-{document_text}
-
-INSTRUCTIONS:
-Extract the following information and return it as a JSON object:
-- company_name: The name of the company (from invoice, report, etc.)
-- document_date: The date of the document (not today's date)
-- total_amount: The main total amount (as a number, without currency symbols)
-- currency: The currency code or symbol used
-- category: Whether this is an "expense" or "income" document
-- line_items: If applicable, list of individual items with descriptions and amounts
-- additional_metrics: Any other relevant financial metrics (revenue, profit, expenses, etc.)
-
-IMPORTANT:
-- Return ONLY valid JSON, no additional text
-- Use null for missing values
-- Extract amounts as numbers without currency symbols
-- Be precise with the document date (not the current date)
-- For reports with multiple amounts, extract all relevant metrics in additional_metrics
-
-JSON OUTPUT:"""
-        
-        return prompt
+        return _EXTRACTION_PROMPT_TEMPLATE.format(document=document_text)
     
     def _extract_with_llm(self, document_text: str) -> Dict:
         """
@@ -175,9 +465,10 @@ JSON OUTPUT:"""
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.1,  # Low temperature for consistent extraction
-                max_tokens=1000
+                max_tokens=1000,
+                response_format=_RESPONSE_FORMAT
             )
-            
+
             # Extract response text
             response_text = response.choices[0].message.content.strip()
             
@@ -187,9 +478,47 @@ JSON OUTPUT:"""
             return extracted_data
             
         except Exception as e:
-            logger.error(f"Error calling OpenAI API: {e}")
+            logger.error("Error calling OpenAI API: %s", e)
             raise
-    
+
+    async def _extract_with_llm_async(self, document_text: str) -> Dict:
+        """
+        Extract data using the async OpenAI client.
+
+        Args:
+            document_text: Document text to extract from
+
+        Returns:
+            Raw extracted data dictionary
+        """
+        try:
+            # Build prompt
+            prompt = self._build_extraction_prompt(document_text)
+
+            # Call OpenAI API
+            response = await self.async_client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": "You are a financial data extraction expert. Always return valid JSON."},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.1,  # Low temperature for consistent extraction
+                max_tokens=1000,
+                response_format=_RESPONSE_FORMAT
+            )
+
+            # Extract response text
+            response_text = response.choices[0].message.content.strip()
+
+            # Parse JSON response
+            extracted_data = self._parse_llm_response(response_text)
+
+            return extracted_data
+
+        except Exception as e:
+            logger.error("Error calling OpenAI API: %s", e)
+            raise
+
     def _parse_llm_response(self, response_text: str) -> Dict:
         """
         Parse LLM JSON response.
@@ -200,25 +529,27 @@ JSON OUTPUT:"""
         Returns:
             Parsed dictionary
         """
+        # Common case: the reply is pure JSON
         try:
-            # Try to find JSON in response (in case LLM added extra text)
-            # Look for content between first { and last }
-            start = response_text.find('{')
-            end = response_text.rfind('}') + 1
-            
-            if start != -1 and end != 0:
-                json_str = response_text[start:end]
-                data = json.loads(json_str)
-                return data
-            else:
-                # Try parsing the whole response
-                data = json.loads(response_text)
-                return data
-                
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse LLM response as JSON: {e}")
-            logger.error(f"Response was: {response_text}")
-            raise ValueError(f"LLM did not return valid JSON: {e}")
+            return _fold_additional_metrics(orjson.loads(response_text))
+        except orjson.JSONDecodeError:
+            pass
+
+        # The LLM wrapped the JSON in extra text - decode from the first '{',
+        # stopping as soon as one complete object has been parsed instead of
+        # scanning the whole reply for the last '}'
+        start = response_text.find('{')
+        if start != -1:
+            try:
+                data, _ = _JSON_DECODER.raw_decode(response_text, start)
+                return _fold_additional_metrics(data)
+            except json.JSONDecodeError as e:
+                logger.error("Failed to parse LLM response as JSON: %s", e)
+                logger.error("Response was: %s", response_text)
+                raise ValueError(f"LLM did not return valid JSON: {e}")
+
+        logger.error("No JSON object found in LLM response: %s", response_text)
+        raise ValueError("LLM did not return valid JSON: no object found")
     
     def _get_mock_response(self, document_text: str, document_name: str) -> Dict:
         """
@@ -231,7 +562,7 @@ JSON OUTPUT:"""
         Returns:
             Mock extracted data
         """
-        logger.info(f"Using mock response for: {document_name}")
+        logger.info("Using mock response for: %s", document_name)
         
         # Determine which document based on content or name
         if 'invoice' in document_name.lower() or 'INVOICE' in document_text:
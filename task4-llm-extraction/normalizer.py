@@ -9,12 +9,69 @@ Date: 2025-11-26
 
 import re
 from datetime import datetime
+
+import numpy as np
 from dateutil import parser
-from typing import Any, Optional, Dict
+from functools import lru_cache
+from typing import Any, Callable, Optional, Dict
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Patterns compiled once at import - these run per field over potentially
+# thousands of line items, so skip the per-call re-cache lookup
+_ORDINAL_RE = re.compile(r'(\d+)(st|nd|rd|th)')
+_NON_NUMERIC_RE = re.compile(r'[^\d.-]')
+
+# Translate tables for amount cleaning - one C-level pass instead of re.sub.
+# The first deletes currency symbols and whitespace - listing both cases of
+# each lev letter covers every casing of the suffix without an IGNORECASE
+# regex; the second deletes every ASCII character that is not part of a
+# number. Rare non-ASCII residue falls back to the regex.
+_AMOUNT_STRIP_TABLE = str.maketrans('', '', '€$£лвЛВ \t\n\r')
+_NON_NUMERIC_TABLE = str.maketrans(
+    '', '', ''.join(chr(i) for i in range(128) if chr(i) not in '0123456789.-')
+)
+
+# Date formats that cover nearly all real documents, tried via strptime
+# before falling back to dateutil's much slower heuristic parser. Order
+# mirrors dateutil's dayfirst=False preference for ambiguous dates.
+_FAST_DATE_FORMATS = (
+    '%Y-%m-%d',
+    '%B %d, %Y',
+    '%m/%d/%Y',
+    '%d/%m/%Y',
+    '%m.%d.%Y',
+    '%d.%m.%Y',
+    '%Y/%m/%d',
+)
+
+# Currency fast paths: the codes we actually track and the one-character
+# symbol dispatch, checked before the full alias map
+_ISO_CODES = frozenset({'USD', 'EUR', 'GBP', 'BGN'})
+_CURRENCY_SYMBOLS = {'$': 'USD', '€': 'EUR', '£': 'GBP'}
+
+# Spelled-out names and remaining symbols, built once at import so a miss
+# on the fast paths above is a single dict probe rather than a rebuild
+_CURRENCY_NAME_MAP = {
+    'DOLLAR': 'USD',
+    'DOLLARS': 'USD',
+    'US DOLLAR': 'USD',
+
+    'EURO': 'EUR',
+    'EUROS': 'EUR',
+
+    'POUND': 'GBP',
+    'POUNDS': 'GBP',
+    'STERLING': 'GBP',
+
+    'ЛВ': 'BGN',
+    'LEV': 'BGN',
+    'LEVA': 'BGN',
+    'BULGARIAN LEV': 'BGN',
+    'BULGARIAN LEVA': 'BGN',
+}
+
 
 def normalize_date(date_str: Any) -> Optional[str]:
     """
@@ -29,28 +86,43 @@ def normalize_date(date_str: Any) -> Optional[str]:
     if not date_str or date_str == "":
         return None
     
-    # If already a string, try to parse
+    # If already a string, try to parse (cached - the same date strings
+    # recur across line items and repeated documents)
     if isinstance(date_str, str):
-        try:
-            # Remove common suffixes like "st", "nd", "rd", "th"
-            cleaned = re.sub(r'(\d+)(st|nd|rd|th)', r'\1', date_str)
-            
-            # Parse with dateutil (flexible parser)
-            parsed_date = parser.parse(cleaned, dayfirst=False)
-            
-            # Return ISO format
-            return parsed_date.strftime('%Y-%m-%d')
-        except Exception as e:
-            logger.warning(f"Could not parse date '{date_str}': {e}")
-            return None
-    
+        return _normalize_date_str(date_str)
+
     # If datetime object, convert directly
     if isinstance(date_str, datetime):
         return date_str.strftime('%Y-%m-%d')
-    
+
     return None
 
 
+@lru_cache(maxsize=1024)
+def _normalize_date_str(date_str: str) -> Optional[str]:
+    """Parse a date string to ISO format (cached on the raw string)."""
+    # Remove common suffixes like "st", "nd", "rd", "th"
+    cleaned = _ORDINAL_RE.sub(r'\1', date_str).strip()
+
+    # Fast path: probe the known formats with strptime. The order is
+    # fixed - ambiguous dates like 1.2.2024 must normalize identically
+    # no matter what was parsed before them
+    for date_format in _FAST_DATE_FORMATS:
+        try:
+            parsed_date = datetime.strptime(cleaned, date_format)
+            return parsed_date.strftime('%Y-%m-%d')
+        except ValueError:
+            continue
+
+    # Slow path: dateutil's flexible parser
+    try:
+        parsed_date = parser.parse(cleaned, dayfirst=False)
+        return parsed_date.strftime('%Y-%m-%d')
+    except Exception as e:
+        logger.warning("Could not parse date '%s': %s", date_str, e)
+        return None
+
+
 def normalize_currency(currency: Any) -> Optional[str]:
     """
     Normalize currency to 3-letter ISO code.
@@ -64,45 +136,32 @@ def normalize_currency(currency: Any) -> Optional[str]:
     if not currency:
         return None
     
-    currency_str = str(currency).strip().upper()
-    
-    # Direct mapping of symbols and names to codes
-    currency_map = {
-        '$': 'USD',
-        'USD': 'USD',
-        'DOLLAR': 'USD',
-        'DOLLARS': 'USD',
-        'US DOLLAR': 'USD',
-        
-        '€': 'EUR',
-        'EUR': 'EUR',
-        'EURO': 'EUR',
-        'EUROS': 'EUR',
-        
-        '£': 'GBP',
-        'GBP': 'GBP',
-        'POUND': 'GBP',
-        'POUNDS': 'GBP',
-        'STERLING': 'GBP',
-        
-        'BGN': 'BGN',
-        'ЛВ': 'BGN',
-        'LEV': 'BGN',
-        'LEVA': 'BGN',
-        'BULGARIAN LEV': 'BGN',
-        'BULGARIAN LEVA': 'BGN',
-    }
-    
-    # Check direct match
-    if currency_str in currency_map:
-        return currency_map[currency_str]
-    
+    # Cached on the canonicalized string - the same few symbols and codes
+    # appear on nearly every document
+    return _normalize_currency_str(str(currency).strip().upper())
+
+
+@lru_cache(maxsize=512)
+def _normalize_currency_str(currency_str: str) -> str:
+    """Map an uppercased currency string to its ISO code (cached)."""
+    # Fast path: the overwhelmingly common inputs are a tracked ISO code
+    # or a single currency symbol
+    if len(currency_str) == 3 and currency_str in _ISO_CODES:
+        return currency_str
+    if len(currency_str) == 1 and currency_str in _CURRENCY_SYMBOLS:
+        return _CURRENCY_SYMBOLS[currency_str]
+
+    # Check direct match against the import-time name map
+    mapped = _CURRENCY_NAME_MAP.get(currency_str)
+    if mapped is not None:
+        return mapped
+
     # Check if it's already a 3-letter code
     if len(currency_str) == 3 and currency_str.isalpha():
         return currency_str
     
     # Default to BGN if ambiguous
-    logger.warning(f"Unknown currency '{currency}', defaulting to BGN")
+    logger.warning("Unknown currency '%s', defaulting to BGN", currency_str)
     return 'BGN'
 
 
@@ -116,28 +175,43 @@ def normalize_amount(amount: Any) -> Optional[float]:
     Returns:
         Clean float value or None if invalid
     """
+    # Fast path first: most values are already numeric, so one exact type
+    # check and return beats the isinstance chain below
+    amount_type = type(amount)
+    if amount_type is float:
+        return amount
+    if amount_type is int:
+        return float(amount)
+
     if amount is None or amount == "":
         return None
-    
-    # If already a number, return as float
+
+    # Numeric subclasses (bool, numpy scalars, ...) missed by the exact
+    # type checks above
     if isinstance(amount, (int, float)):
         return float(amount)
-    
+
     # If string, clean and parse
     if isinstance(amount, str):
         try:
-            # Remove currency symbols and whitespace
-            cleaned = amount.strip()
-            cleaned = re.sub(r'[€$£лв]', '', cleaned, flags=re.IGNORECASE)
-            cleaned = cleaned.strip()
+            # Remove currency symbols and whitespace in one translate pass
+            cleaned = amount.translate(_AMOUNT_STRIP_TABLE)
             
             # Remove thousand separators (commas, spaces, periods in some locales)
             # Handle European format (1.234,56) vs US format (1,234.56)
-            
-            # Count periods and commas
-            period_count = cleaned.count('.')
-            comma_count = cleaned.count(',')
-            
+
+            # Classify separators in a single pass instead of four scans
+            # (count + rfind for each of '.' and ',')
+            period_count = comma_count = 0
+            period_pos = comma_pos = -1
+            for i, ch in enumerate(cleaned):
+                if ch == '.':
+                    period_count += 1
+                    period_pos = i
+                elif ch == ',':
+                    comma_count += 1
+                    comma_pos = i
+
             if period_count > 1:
                 # European format: 1.234.567,89
                 cleaned = cleaned.replace('.', '')  # Remove thousand separators
@@ -147,8 +221,6 @@ def normalize_amount(amount: Any) -> Optional[float]:
                 cleaned = cleaned.replace(',', '')  # Remove thousand separators
             elif period_count == 1 and comma_count == 1:
                 # Determine which is decimal separator
-                period_pos = cleaned.rfind('.')
-                comma_pos = cleaned.rfind(',')
                 if period_pos > comma_pos:
                     # US format: 1,234.56
                     cleaned = cleaned.replace(',', '')
@@ -159,26 +231,54 @@ def normalize_amount(amount: Any) -> Optional[float]:
             elif comma_count == 1 and period_count == 0:
                 # Could be European decimal: 1234,56
                 # Check if comma is in last 3 positions (likely decimal)
-                if len(cleaned) - cleaned.rfind(',') <= 3:
+                if len(cleaned) - comma_pos <= 3:
                     cleaned = cleaned.replace(',', '.')
                 else:
                     # Likely thousand separator
                     cleaned = cleaned.replace(',', '')
             
             # Remove any remaining non-numeric characters except decimal point and minus
-            cleaned = re.sub(r'[^\d.-]', '', cleaned)
-            
+            cleaned = cleaned.translate(_NON_NUMERIC_TABLE)
+            if not cleaned.isascii():
+                # Non-ASCII residue the table cannot cover
+                cleaned = _NON_NUMERIC_RE.sub('', cleaned)
+
             # Convert to float
             value = float(cleaned)
             return value
             
         except Exception as e:
-            logger.warning(f"Could not parse amount '{amount}': {e}")
+            logger.warning("Could not parse amount '%s': %s", amount, e)
             return None
     
     return None
 
 
+def normalize_amounts(amounts: Any) -> np.ndarray:
+    """
+    Normalize a batch of amounts into one float64 array.
+
+    Bulk counterpart to normalize_amount for ingest-style callers that
+    process many extractions at once: each value goes through the scalar
+    fast paths (numerics short-circuit, strings get locale handling) and
+    the results land in a single numpy array. Unparseable entries become
+    NaN instead of None so the output stays a uniform numeric array.
+
+    Args:
+        amounts: Iterable of amounts in any format normalize_amount accepts
+
+    Returns:
+        numpy array of float64 values, NaN where normalization failed
+    """
+    amounts = list(amounts)
+    normalized = (normalize_amount(amount) for amount in amounts)
+    return np.fromiter(
+        (value if value is not None else np.nan for value in normalized),
+        dtype=np.float64,
+        count=len(amounts),
+    )
+
+
 def normalize_category(category: Any) -> Optional[str]:
     """
     Normalize category to standard format.
@@ -192,56 +292,120 @@ def normalize_category(category: Any) -> Optional[str]:
     if not category:
         return None
     
-    category_str = str(category).strip().lower()
-    
+    # Cached on the canonicalized string - category values repeat constantly
+    return _normalize_category_str(str(category).strip().lower())
+
+
+@lru_cache(maxsize=512)
+def _normalize_category_str(category_str: str) -> str:
+    """Map a lowercased category string to its standard form (cached)."""
     # Map synonyms to standard categories
     expense_terms = ['expense', 'cost', 'expenditure', 'spending', 'outgoing']
     income_terms = ['income', 'revenue', 'earning', 'profit', 'receipt', 'incoming']
-    
+
     for term in expense_terms:
         if term in category_str:
             return 'expense'
-    
+
     for term in income_terms:
         if term in category_str:
             return 'income'
-    
+
     # Return as-is if no match
     return category_str
 
 
+def _identity(value: Any) -> Any:
+    """Pass-through for fields that need no normalization."""
+    return value
+
+
+def normalize_line_items(items: Any) -> Any:
+    """
+    Normalize the amount of each line item in bulk.
+
+    Amounts are overwhelmingly already numeric, so those are converted with
+    one vectorized cast instead of one normalize_amount call per entry.
+    String amounts (locale formats, currency symbols) still go through
+    normalize_amount, which knows how to disambiguate separators.
+
+    Args:
+        items: List of line item dictionaries
+
+    Returns:
+        List with normalized amounts, or the input unchanged if it is not
+        a list of items
+    """
+    if not isinstance(items, list) or not items:
+        return items
+
+    normalized_items = []
+    numeric_items = []
+    numeric_values = []
+    for line_item in items:
+        if not isinstance(line_item, dict):
+            normalized_items.append(line_item)
+            continue
+        item = dict(line_item)
+        amount = item.get('amount')
+        if isinstance(amount, (int, float)):
+            numeric_items.append(item)
+            numeric_values.append(amount)
+        elif amount is not None:
+            item['amount'] = normalize_amount(amount)
+        normalized_items.append(item)
+
+    if numeric_values:
+        # One C-level cast for the whole batch
+        for item, value in zip(numeric_items,
+                               np.asarray(numeric_values, dtype=np.float64).tolist()):
+            item['amount'] = value
+
+    return normalized_items
+
+
+# Fields with a dedicated normalizer; everything else (company_name,
+# line_items, additional metrics, ...) passes through via _identity
+_FIELD_NORMALIZERS = {
+    'document_date': normalize_date,
+    'total_amount': normalize_amount,
+    'currency': normalize_currency,
+    'category': normalize_category,
+    'line_items': normalize_line_items,
+}
+
+# Normalizers specialized per field set, built on first sight of a schema
+_specialized_normalizers: Dict[frozenset, Callable[[Dict], Dict]] = {}
+
+
+def _specialize_normalizer(raw_data: Dict) -> Callable[[Dict], Dict]:
+    """
+    Build a normalizer hard-wired to one document schema.
+
+    Documents of the same class (invoice, quarterly report, annual report)
+    share a field set, so the which-fields-are-present dispatch is resolved
+    once per schema instead of once per document.
+    """
+    steps = tuple((name, _FIELD_NORMALIZERS.get(name, _identity)) for name in raw_data)
+
+    def normalize(data: Dict) -> Dict:
+        return {name: func(data[name]) for name, func in steps}
+
+    return normalize
+
+
 def normalize_extraction(raw_data: Dict) -> Dict:
     """
     Apply all normalizations to extracted data.
-    
+
     Args:
         raw_data: Raw extracted data dictionary
-        
+
     Returns:
         Normalized data dictionary
     """
-    normalized = {}
-    
-    # Normalize each field
-    if 'company_name' in raw_data:
-        # Keep company name as-is (proper noun)
-        normalized['company_name'] = raw_data['company_name']
-    
-    if 'document_date' in raw_data:
-        normalized['document_date'] = normalize_date(raw_data['document_date'])
-    
-    if 'total_amount' in raw_data:
-        normalized['total_amount'] = normalize_amount(raw_data['total_amount'])
-    
-    if 'currency' in raw_data:
-        normalized['currency'] = normalize_currency(raw_data['currency'])
-    
-    if 'category' in raw_data:
-        normalized['category'] = normalize_category(raw_data['category'])
-    
-    # Pass through other fields as-is
-    for key, value in raw_data.items():
-        if key not in normalized:
-            normalized[key] = value
-    
-    return normalized
+    fields = frozenset(raw_data)
+    specialized = _specialized_normalizers.get(fields)
+    if specialized is None:
+        specialized = _specialized_normalizers[fields] = _specialize_normalizer(raw_data)
+    return specialized(raw_data)
@@ -12,9 +12,12 @@ import json
 from datetime import datetime
 from unittest.mock import Mock, patch
 
+import numpy as np
+
 from normalizer import (
     normalize_date, normalize_currency, normalize_amount,
-    normalize_category, normalize_extraction
+    normalize_amounts, normalize_category, normalize_line_items,
+    normalize_extraction
 )
 from validator import DataValidator, REQUIRED_FIELDS
 from llm_extractor import LLMDataExtractor
@@ -24,31 +27,23 @@ from data_extractor import TraditionalExtractor
 class TestNormalizer:
     """Test normalization functions."""
     
-    def test_normalize_date_iso_format(self):
-        """Test date already in ISO format."""
-        assert normalize_date('2024-01-15') == '2024-01-15'
-    
-    def test_normalize_date_us_format(self):
-        """Test US date format."""
-        assert normalize_date('January 15, 2024') == '2024-01-15'
-        assert normalize_date('01/15/2024') == '2024-01-15'
-
-    def test_normalize_date_eu_format(self):
-        """Test EU date format."""
-        assert normalize_date('15.01.2024') == '2024-01-15'
-        assert normalize_date('1.1.2024') == '2024-01-01'
-    
-    def test_normalize_date_with_ordinals(self):
-        """Test dates with ordinal suffixes."""
-        assert normalize_date('January 15th, 2024') == '2024-01-15'
-        assert normalize_date('March 3rd, 2024') == '2024-03-03'
-    
-    def test_normalize_date_invalid(self):
-        """Test invalid date."""
-        assert normalize_date('invalid') is None
-        assert normalize_date('') is None
-        assert normalize_date(None) is None
-    
+    @pytest.mark.parametrize('raw,expected', [
+        ('2024-01-15', '2024-01-15'),        # already ISO
+        ('January 15, 2024', '2024-01-15'),  # US formats
+        ('01/15/2024', '2024-01-15'),
+        ('15.01.2024', '2024-01-15'),        # EU formats
+        ('1.1.2024', '2024-01-01'),
+        ('January 15th, 2024', '2024-01-15'),  # ordinal suffixes
+        ('March 3rd, 2024', '2024-03-03'),
+        ('invalid', None),                   # invalid input
+        ('', None),
+        (None, None),
+    ])
+    def test_normalize_date(self, raw, expected):
+        """Test date normalization across formats."""
+        assert normalize_date(raw) == expected
+
+
     def test_normalize_currency_symbols(self):
         """Test currency symbol normalization."""
         assert normalize_currency('$') == 'USD'
@@ -94,6 +89,49 @@ class TestNormalizer:
         assert normalize_amount('') is None
         assert normalize_amount(None) is None
     
+    def test_normalize_amounts_batch(self):
+        """Test bulk amount normalization into one array."""
+        result = normalize_amounts([1234.56, 100, '1,234.56', '€1.234,56'])
+
+        assert result.dtype == np.float64
+        assert result.tolist() == [1234.56, 100.0, 1234.56, 1234.56]
+
+    def test_normalize_amounts_nan_for_invalid(self):
+        """Test that unparseable entries become NaN, not None."""
+        result = normalize_amounts(['invalid', None, '42'])
+
+        assert np.isnan(result[0])
+        assert np.isnan(result[1])
+        assert result[2] == 42.0
+
+    def test_normalize_line_items_mixed_amounts(self):
+        """Test line item amounts across numeric and string formats."""
+        items = [
+            {'description': 'A', 'amount': 100},          # int -> float
+            {'description': 'B', 'amount': 49.99},
+            {'description': 'C', 'amount': '$1,234.56'},  # string -> parsed
+        ]
+
+        normalized = normalize_line_items(items)
+
+        assert normalized == [
+            {'description': 'A', 'amount': 100.0},
+            {'description': 'B', 'amount': 49.99},
+            {'description': 'C', 'amount': 1234.56},
+        ]
+        assert all(type(item['amount']) is float for item in normalized)
+        # Input items are copied, not mutated
+        assert items[0]['amount'] == 100
+
+    def test_normalize_line_items_non_dict_entries(self):
+        """Test that non-dict entries and non-lists pass through."""
+        assert normalize_line_items(['stray', {'amount': 5}]) == [
+            'stray', {'amount': 5.0}
+        ]
+        assert normalize_line_items(None) is None
+        assert normalize_line_items([]) == []
+        assert normalize_line_items('not a list') == 'not a list'
+
     def test_normalize_category(self):
         """Test category normalization."""
         assert normalize_category('expense') == 'expense'
@@ -108,74 +146,74 @@ class TestNormalizer:
             'document_date': 'January 15, 2024',
             'total_amount': '$1,234.56',
             'currency': '$',
-            'category': 'EXPENSE'
+            'category': 'EXPENSE',
+            'line_items': [{'description': 'Item', 'amount': '1,000.00'}]
         }
-        
+
         normalized = normalize_extraction(raw_data)
-        
+
         assert normalized['company_name'] == 'Test Company'
         assert normalized['document_date'] == '2024-01-15'
         assert normalized['total_amount'] == 1234.56
         assert normalized['currency'] == 'USD'
         assert normalized['category'] == 'expense'
+        assert normalized['line_items'] == [
+            {'description': 'Item', 'amount': 1000.0}
+        ]
 
 
 class TestValidator:
-    """Test validation functions."""
-    
-    def setup_method(self):
-        """Set up test fixtures."""
-        self.validator = DataValidator()
-    
-    def test_validate_amount_valid(self):
-        """Test valid amount validation."""
-        assert self.validator.validate_amount(100.50) is True
-        assert self.validator.validate_amount(0) is True
-        assert self.validator.validate_amount(1000000) is True
-    
-    def test_validate_amount_invalid(self):
-        """Test invalid amount validation."""
-        assert self.validator.validate_amount(-100) is False
-        assert self.validator.validate_amount(None) is False
-        assert self.validator.validate_amount('invalid') is False
-    
-    def test_validate_date_valid(self):
-        """Test valid date validation."""
-        assert self.validator.validate_date('2024-01-15') is True
-        assert self.validator.validate_date('2023-12-31') is True
-    
-    def test_validate_date_invalid(self):
-        """Test invalid date validation."""
-        assert self.validator.validate_date('2024-13-01') is False  # Invalid month
-        assert self.validator.validate_date('01/15/2024') is False  # Wrong format
-        assert self.validator.validate_date('invalid') is False
-        assert self.validator.validate_date(None) is False
-    
-    def test_validate_currency_valid(self):
-        """Test valid currency validation."""
-        assert self.validator.validate_currency('USD') is True
-        assert self.validator.validate_currency('EUR') is True
-        assert self.validator.validate_currency('BGN') is True
-    
-    def test_validate_currency_invalid(self):
-        """Test invalid currency validation."""
-        assert self.validator.validate_currency('US') is False  # Too short
-        assert self.validator.validate_currency('USDD') is False  # Too long
-        assert self.validator.validate_currency('$') is False
-        assert self.validator.validate_currency(None) is False
-    
-    def test_validate_company_name_valid(self):
-        """Test valid company name validation."""
-        assert self.validator.validate_company_name('Acme Corp') is True
-        assert self.validator.validate_company_name('Test Company Ltd.') is True
-    
-    def test_validate_company_name_invalid(self):
-        """Test invalid company name validation."""
-        assert self.validator.validate_company_name('A') is False  # Too short
-        assert self.validator.validate_company_name('') is False
-        assert self.validator.validate_company_name(None) is False
-    
-    def test_validate_required_fields(self):
+    """Test validation functions (shared session-scoped validator fixture)."""
+
+    @pytest.mark.parametrize('amount,expected', [
+        (100.50, True),
+        (0, True),
+        (1000000, True),
+        (-100, False),
+        (None, False),
+        ('invalid', False),
+    ])
+    def test_validate_amount(self, validator, amount, expected):
+        """Test amount validation."""
+        assert validator.validate_amount(amount) is expected
+
+    @pytest.mark.parametrize('date_str,expected', [
+        ('2024-01-15', True),
+        ('2023-12-31', True),
+        ('2024-13-01', False),  # Invalid month
+        ('01/15/2024', False),  # Wrong format
+        ('invalid', False),
+        (None, False),
+    ])
+    def test_validate_date(self, validator, date_str, expected):
+        """Test date validation."""
+        assert validator.validate_date(date_str) is expected
+
+    @pytest.mark.parametrize('currency,expected', [
+        ('USD', True),
+        ('EUR', True),
+        ('BGN', True),
+        ('US', False),  # Too short
+        ('USDD', False),  # Too long
+        ('$', False),
+        (None, False),
+    ])
+    def test_validate_currency(self, validator, currency, expected):
+        """Test currency validation."""
+        assert validator.validate_currency(currency) is expected
+
+    @pytest.mark.parametrize('company_name,expected', [
+        ('Acme Corp', True),
+        ('Test Company Ltd.', True),
+        ('A', False),  # Too short
+        ('', False),
+        (None, False),
+    ])
+    def test_validate_company_name(self, validator, company_name, expected):
+        """Test company name validation."""
+        assert validator.validate_company_name(company_name) is expected
+
+    def test_validate_required_fields(self, validator):
         """Test required field validation."""
         complete_data = {
             'company_name': 'Test',
@@ -183,15 +221,15 @@ class TestValidator:
             'total_amount': 100.0,
             'currency': 'USD'
         }
-        assert self.validator.validate_required_fields(complete_data) == []
-        
+        assert validator.validate_required_fields(complete_data) == []
+
         incomplete_data = {'company_name': 'Test'}
-        missing = self.validator.validate_required_fields(incomplete_data)
+        missing = validator.validate_required_fields(incomplete_data)
         assert 'document_date' in missing
         assert 'total_amount' in missing
         assert 'currency' in missing
-    
-    def test_validate_extraction_complete(self):
+
+    def test_validate_extraction_complete(self, validator):
         """Test complete extraction validation."""
         valid_data = {
             'company_name': 'Test Company',
@@ -199,12 +237,12 @@ class TestValidator:
             'total_amount': 1234.56,
             'currency': 'USD'
         }
-        
-        is_valid, errors = self.validator.validate_extraction(valid_data)
+
+        is_valid, errors = validator.validate_extraction(valid_data)
         assert is_valid is True
         assert len(errors) == 0
-    
-    def test_validate_extraction_with_errors(self):
+
+    def test_validate_extraction_with_errors(self, validator):
         """Test extraction with validation errors."""
         invalid_data = {
             'company_name': '',  # Invalid
@@ -212,8 +250,8 @@ class TestValidator:
             'total_amount': -100,  # Invalid
             'currency': '$'  # Invalid
         }
-        
-        is_valid, errors = self.validator.validate_extraction(invalid_data)
+
+        is_valid, errors = validator.validate_extraction(invalid_data)
         assert is_valid is False
         assert len(errors) > 0
 
@@ -291,45 +329,41 @@ class TestLLMExtractor:
 
 
 class TestTraditionalExtractor:
-    """Test traditional extractor."""
-    
-    def setup_method(self):
-        """Set up test fixtures."""
-        self.extractor = TraditionalExtractor()
-    
-    def test_extract_company_name(self):
+    """Test traditional extractor (shared session-scoped fixture)."""
+
+    def test_extract_company_name(self, traditional_extractor):
         """Test company name extraction."""
         text = "From: Acme Corporation Ltd.\nInvoice details..."
-        name = self.extractor.extract_company_name(text)
+        name = traditional_extractor.extract_company_name(text)
         assert name == 'Acme Corporation Ltd.'
-    
-    def test_extract_date_various_formats(self):
+
+    def test_extract_date_various_formats(self, traditional_extractor):
         """Test date extraction from various formats."""
         text1 = "Date: January 15, 2024"
-        assert self.extractor.extract_date(text1) == 'January 15, 2024'
-        
+        assert traditional_extractor.extract_date(text1) == 'January 15, 2024'
+
         text2 = "Date: 01/15/2024"
-        assert self.extractor.extract_date(text2) == '01/15/2024'
-    
-    def test_extract_amount(self):
+        assert traditional_extractor.extract_date(text2) == '01/15/2024'
+
+    def test_extract_amount(self, traditional_extractor):
         """Test amount extraction."""
         text = "TOTAL: $1,234.56"
-        amount = self.extractor.extract_amount(text)
+        amount = traditional_extractor.extract_amount(text)
         assert amount is not None
-    
-    def test_extract_currency(self):
+
+    def test_extract_currency(self, traditional_extractor):
         """Test currency extraction."""
         text = "Total: $1,234.56 USD"
-        currency = self.extractor.extract_currency(text)
+        currency = traditional_extractor.extract_currency(text)
         assert currency in ['$', 'USD']
-    
-    def test_extract_category(self):
+
+    def test_extract_category(self, traditional_extractor):
         """Test category extraction."""
         invoice_text = "INVOICE #123\nPayment due..."
-        assert self.extractor.extract_category(invoice_text) == 'expense'
-        
+        assert traditional_extractor.extract_category(invoice_text) == 'expense'
+
         revenue_text = "Revenue Report\nTotal sales..."
-        assert self.extractor.extract_category(revenue_text) == 'income'
+        assert traditional_extractor.extract_category(revenue_text) == 'income'
 
 
 if __name__ == '__main__':
@@ -10,11 +10,11 @@ Date: 2025-11-26
 import sys
 import logging
 import argparse
-import schedule
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-import threading
+import multiprocessing
 
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent))
@@ -24,10 +24,10 @@ from config import (
     EXCHANGE_RATE_API_URL, TRACKED_CURRENCIES, RSS_FEEDS
 )
 from src.storage.database import Database
-from src.collectors.exchange_rate_collector import ExchangeRateCollector
-from src.collectors.news_collector import NewsCollector
-from src.processors.data_processor import DataProcessor
-from src.api.app import run_server
+
+# The collectors (requests, feedparser) and the Flask app are imported
+# lazily inside the commands that need them, so short-lived invocations
+# like init-db don't pay their import cost
 
 # Configure logging
 logging.basicConfig(
@@ -41,81 +41,92 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-def update_data():
+def _build_collectors():
+    """Construct the rate and news collectors from config."""
+    from src.collectors.exchange_rate_collector import ExchangeRateCollector
+    from src.collectors.news_collector import NewsCollector
+
+    rate_collector = ExchangeRateCollector(
+        api_url=EXCHANGE_RATE_API_URL,
+        tracked_currencies=TRACKED_CURRENCIES
+    )
+    news_collector = NewsCollector(rss_feeds=RSS_FEEDS)
+    return rate_collector, news_collector
+
+
+def update_data(rate_collector=None, news_collector=None):
     """
     Collect and process data from all sources.
-    
+
     This function:
     1. Collects exchange rates
     2. Collects news from RSS feeds
     3. Processes and validates data
     4. Stores in database
+
+    Args:
+        rate_collector: Optional ExchangeRateCollector to reuse. The
+            scheduler passes long-lived collectors so their HTTP
+            sessions and conditional-GET validators survive across
+            cycles; one-shot runs build fresh ones.
+        news_collector: Optional NewsCollector to reuse, likewise.
     """
+    from src.processors.data_processor import DataProcessor
+
     logger.info("=" * 60)
     logger.info("Starting data update")
     logger.info("=" * 60)
-    
+
     db = Database(DATABASE_PATH)
     processor = DataProcessor()
-    
+
+    # One clock read for the whole update - rates and metadata share it
+    now = datetime.now()
+    now_iso = now.isoformat()
+
+    # Kick off both network collections concurrently - they are independent
+    # and each is dominated by HTTP latency, so wall-clock time is the
+    # slower of the two instead of their sum. Database access stays on this
+    # thread to keep sqlite writes serialized.
+    logger.info("Collecting exchange rates and news...")
+    if rate_collector is None or news_collector is None:
+        rate_collector, news_collector = _build_collectors()
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        rates_future = executor.submit(rate_collector.collect_rates)
+        news_future = executor.submit(news_collector.collect_news, limit=10)
+
     try:
-        # Collect exchange rates
-        logger.info("Collecting exchange rates...")
-        rate_collector = ExchangeRateCollector(
-            api_url=EXCHANGE_RATE_API_URL,
-            tracked_currencies=TRACKED_CURRENCIES
-        )
-        rates = rate_collector.collect_rates()
-        
-        # Get previous rates for change calculation
-        previous_rates = {}
-        for currency in TRACKED_CURRENCIES:
-            prev_rate = db.get_previous_rate(currency)
-            if prev_rate:
-                previous_rates[currency] = prev_rate
-        
+        rates = rates_future.result()
+
+        # Get previous rates for change calculation (one query for all
+        # tracked currencies)
+        previous_rates = db.get_previous_rates(TRACKED_CURRENCIES)
+
         # Process rates
-        processed_rates = processor.process_exchange_rates(rates, previous_rates)
-        
-        # Store rates
-        for rate_data in processed_rates:
-            db.insert_exchange_rate(
-                currency_code=rate_data['currency_code'],
-                rate=rate_data['rate'],
-                timestamp=rate_data['timestamp'],
-                daily_change=rate_data['daily_change']
-            )
+        processed_rates = processor.process_exchange_rates(rates, previous_rates, timestamp=now)
         
+        # Store rates in one batched transaction
+        db.insert_exchange_rates_many(processed_rates)
+
         # Update metadata
-        db.update_metadata('last_rate_update', datetime.now().isoformat())
+        db.update_metadata('last_rate_update', now_iso)
         logger.info(f"✅ Successfully updated {len(processed_rates)} exchange rates")
         
     except Exception as e:
         logger.error(f"❌ Error updating exchange rates: {e}")
     
     try:
-        # Collect news
-        logger.info("Collecting news from RSS feeds...")
-        news_collector = NewsCollector(rss_feeds=RSS_FEEDS)
-        news_items = news_collector.collect_news(limit=10)
-        
+        news_items = news_future.result()
+
         # Process news
         processed_news = processor.process_news(news_items)
         
-        # Store news
-        new_count = 0
-        for news_data in processed_news:
-            rows = db.insert_news(
-                title=news_data['title'],
-                link=news_data['link'],
-                source=news_data['source'],
-                description=news_data['description'],
-                published_date=news_data['published_date']
-            )
-            new_count += rows
-        
+        # Store news in one batched transaction
+        new_count = db.insert_news_many(processed_news)
+
         # Update metadata
-        db.update_metadata('last_news_update', datetime.now().isoformat())
+        db.update_metadata('last_news_update', now_iso)
         logger.info(f"✅ Successfully added {new_count} new articles (out of {len(processed_news)} collected)")
         
     except Exception as e:
@@ -142,31 +153,38 @@ def run_scheduler():
     init_database()
     
     logger.info(f"Starting scheduler (update every {UPDATE_INTERVAL_MINUTES} minutes)")
-    
-    # Schedule updates
-    schedule.every(UPDATE_INTERVAL_MINUTES).minutes.do(update_data)
-    
-    # Run initial update
-    update_data()
-    
-    # Keep running
+
+    # Collectors live for the scheduler's lifetime so their pooled HTTP
+    # sessions and ETag/Last-Modified validators carry across cycles -
+    # unchanged feeds then cost a bodyless 304 instead of a full fetch
+    rate_collector, news_collector = _build_collectors()
+
+    # Sleep straight to the next monotonic deadline instead of waking every
+    # minute to poll; deadlines accumulate from the start time so a slow
+    # update does not drift the schedule
+    next_run = time.monotonic()
     while True:
-        schedule.run_pending()
-        time.sleep(60)  # Check every minute
+        update_data(rate_collector, news_collector)
+        next_run += UPDATE_INTERVAL_MINUTES * 60
+        time.sleep(max(0, next_run - time.monotonic()))
 
 
 def run_with_scheduler():
     """Run API server with scheduler in background."""
+    from src.api.app import run_server
+
     # Ensure DB is initialized
     init_database()
-    
+
     logger.info("Starting API server with scheduler")
-    
-    # Run scheduler in background thread
-    scheduler_thread = threading.Thread(target=run_scheduler, daemon=True)
-    scheduler_thread.start()
-    
-    # Run API server in main thread
+
+    # Run the scheduler in its own process so update cycles (HTTP fetches,
+    # parsing, sqlite writes) never contend with API request handling for
+    # the GIL; WAL mode lets both processes share the database
+    scheduler_process = multiprocessing.Process(target=run_scheduler, daemon=True)
+    scheduler_process.start()
+
+    # Run API server in main process
     run_server()
 
 
@@ -183,6 +201,7 @@ def main():
     elif args.command == 'update':
         update_data()
     elif args.command == 'serve':
+        from src.api.app import run_server
         run_server()
     elif args.command == 'schedule':
         run_with_scheduler()
@@ -7,11 +7,16 @@ Author: Financial Dashboard Pipeline
 Date: 2025-11-26
 """
 
-from flask import Flask, jsonify, request, render_template
+import orjson
+from flask import Flask, request, render_template
+from flask.json.provider import JSONProvider
 from flask_cors import CORS
 import logging
+import sqlite3
 import sys
 from datetime import datetime
+from itertools import groupby
+from operator import itemgetter
 from pathlib import Path
 
 # Add src to path
@@ -22,28 +27,87 @@ from config import (
     MAX_HISTORY_DAYS, DEFAULT_HISTORY_DAYS,
     MAX_NEWS_LIMIT, DEFAULT_NEWS_LIMIT
 )
-from src.storage.database import Database
+from src.storage.connection_pool import ConnectionPool
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+class OrjsonProvider(JSONProvider):
+    """JSON provider backed by orjson, so jsonify serializes in native code."""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
 # Initialize Flask app
-app = Flask(__name__, 
+app = Flask(__name__,
             template_folder='../../templates',
             static_folder='../../static')
+app.json = OrjsonProvider(app)
 CORS(app)
 
 # Track app start time for uptime
 app_start_time = datetime.now()
 
 
+def _json_response(obj, status=200):
+    """
+    Build a JSON response straight from orjson bytes.
+
+    Skips the jsonify/provider round-trip (and its bytes-to-str decode);
+    orjson also serializes datetime values natively, so rows can be passed
+    through without manual isoformat conversion.
+    """
+    return app.response_class(
+        orjson.dumps(obj, option=orjson.OPT_NAIVE_UTC),
+        status=status,
+        mimetype='application/json'
+    )
+
+
+# Pooled connections - created lazily on first use so importing the app
+# doesn't touch the database file
+_db_pool = ConnectionPool(DATABASE_PATH, size=8)
+
+
+# Cached response bodies keyed by the relevant last_*_update metadata
+# value. The underlying data only changes once per collection cycle
+# (minutes), so on a key match the rate/news query and the orjson
+# serialization are skipped entirely - the only SQL left is a single
+# primary-key metadata probe. Tuple assignment is atomic, so no lock is
+# needed across request threads.
+_rates_cache = (None, b'')  # (last_rate_update, response bytes)
+_news_cache = (None, b'')   # ((last_news_update, limit), response bytes)
+
+
+def _conditional_response(body, etag):
+    """
+    Build a JSON response honoring conditional-GET headers.
+
+    The ETag is derived from the last_*_update metadata, so clients
+    polling between collection cycles get a bodyless 304 instead of the
+    full payload.
+    """
+    if etag is not None and etag in request.if_none_match:
+        return app.response_class(status=304)
+    response = app.response_class(body, mimetype='application/json')
+    if etag is not None:
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'public, max-age=30'
+    return response
+
+
 def get_db():
     """
-    Get database connection for current request.
-    
-    Creates a new connection per request to avoid thread safety issues.
+    Borrow a pooled database connection for the current request.
+
+    Returns a context manager yielding a Database, returned to the pool
+    afterwards.
     """
-    return Database(DATABASE_PATH)
+    return _db_pool.checkout()
 
 
 @app.route('/')
@@ -60,15 +124,18 @@ def get_rates():
     Returns:
         JSON with current rates for all tracked currencies
     """
-    db = None
+    global _rates_cache
     try:
-        db = get_db()
-        rates_data = db.get_latest_rates()
-        
+        with get_db() as db:
+            last_update = db.get_metadata('last_rate_update')
+            if last_update is not None and _rates_cache[0] == last_update:
+                return _conditional_response(_rates_cache[1], last_update)
+            rates_data = db.get_latest_rates()
+
         if not rates_data:
-            return jsonify({
+            return _json_response({
                 'error': 'No exchange rate data available'
-            }), 404
+            }, status=404)
         
         # Format response
         rates = {}
@@ -84,15 +151,15 @@ def get_rates():
             'timestamp': timestamp,
             'rates': rates
         }
-        
-        return jsonify(response)
-        
+
+        body = orjson.dumps(response, option=orjson.OPT_NAIVE_UTC)
+        if last_update is not None:
+            _rates_cache = (last_update, body)
+        return _conditional_response(body, last_update)
+
     except Exception as e:
         logger.error(f"Error getting rates: {e}")
-        return jsonify({'error': 'Internal server error'}), 500
-    finally:
-        if db:
-            db.close()
+        return _json_response({'error': 'Internal server error'}, status=500)
 
 
 @app.route('/api/rates/history', methods=['GET'])
@@ -106,57 +173,48 @@ def get_rate_history():
     Returns:
         JSON with historical rates for all currencies
     """
-    db = None
     try:
-        db = get_db()
-        
         # Get and validate days parameter
         days = request.args.get('days', DEFAULT_HISTORY_DAYS, type=int)
         days = max(1, min(days, MAX_HISTORY_DAYS))  # Clamp to valid range
-        
-        history_data = db.get_rate_history(days)
-        
-        if not history_data:
-            return jsonify({
+
+        # Rows arrive aggregated and sorted by date descending, so one
+        # linear groupby pass over the streamed cursor replaces the dict
+        # regrouping and final sort; no intermediate row list is built
+        with get_db() as db:
+            history = [
+                {
+                    'date': date,
+                    'rates': {
+                        record['currency_code']: {
+                            'rate': record['rate'],
+                            'change': record['daily_change']
+                        }
+                        for record in records
+                    }
+                }
+                for date, records in groupby(
+                    db.iter_rate_history(days, group_by_date=True),
+                    key=itemgetter('date')
+                )
+            ]
+
+        if not history:
+            return _json_response({
                 'error': 'No historical data available'
-            }), 404
-        
-        # Group by date
-        history_by_date = {}
-        for record in history_data:
-            date = record['date']
-            currency = record['currency_code']
-            
-            if date not in history_by_date:
-                history_by_date[date] = {}
-            
-            history_by_date[date][currency] = {
-                'rate': record['rate'],
-                'change': record['daily_change']
-            }
-        
-        # Format response
-        history = []
-        for date in sorted(history_by_date.keys(), reverse=True):
-            history.append({
-                'date': date,
-                'rates': history_by_date[date]
-            })
-        
+            }, status=404)
+
         response = {
             'base_currency': 'BGN',
             'days': days,
             'history': history
         }
         
-        return jsonify(response)
-        
+        return _json_response(response)
+
     except Exception as e:
         logger.error(f"Error getting rate history: {e}")
-        return jsonify({'error': 'Internal server error'}), 500
-    finally:
-        if db:
-            db.close()
+        return _json_response({'error': 'Internal server error'}, status=500)
 
 
 @app.route('/api/news', methods=['GET'])
@@ -170,29 +228,33 @@ def get_news():
     Returns:
         JSON with recent news articles
     """
-    db = None
+    global _news_cache
     try:
-        db = get_db()
-        
         # Get and validate limit parameter
         limit = request.args.get('limit', DEFAULT_NEWS_LIMIT, type=int)
         limit = max(1, min(limit, MAX_NEWS_LIMIT))  # Clamp to valid range
-        
-        news_data = db.get_recent_news(limit)
-        
+
+        with get_db() as db:
+            last_update = db.get_metadata('last_news_update')
+            cache_key = (last_update, limit)
+            etag = f"{last_update}/{limit}" if last_update is not None else None
+            if last_update is not None and _news_cache[0] == cache_key:
+                return _conditional_response(_news_cache[1], etag)
+            news_data = db.get_recent_news(limit)
+
         response = {
             'count': len(news_data),
             'news': news_data
         }
-        
-        return jsonify(response)
-        
+
+        body = orjson.dumps(response, option=orjson.OPT_NAIVE_UTC)
+        if last_update is not None:
+            _news_cache = (cache_key, body)
+        return _conditional_response(body, etag)
+
     except Exception as e:
         logger.error(f"Error getting news: {e}")
-        return jsonify({'error': 'Internal server error'}), 500
-    finally:
-        if db:
-            db.close()
+        return _json_response({'error': 'Internal server error'}, status=500)
 
 
 @app.route('/api/health', methods=['GET'])
@@ -203,21 +265,22 @@ def health_check():
     Returns:
         JSON with system health information
     """
-    db = None
     try:
-        db = get_db()
-        
-        # Check database connection
+        # The metadata read doubles as the connectivity probe - one query
+        # for both update times instead of an extra connect() plus two
+        # separate lookups, and only sqlite errors mark us disconnected
+        metadata = {}
         db_status = 'connected'
         try:
-            db.connect()
-        except:
+            with get_db() as db:
+                metadata = db.get_metadata_many(
+                    ('last_rate_update', 'last_news_update'))
+        except sqlite3.Error:
             db_status = 'disconnected'
-        
-        # Get last update times
-        last_rate_update = db.get_metadata('last_rate_update')
-        last_news_update = db.get_metadata('last_news_update')
-        
+
+        last_rate_update = metadata.get('last_rate_update')
+        last_news_update = metadata.get('last_news_update')
+
         # Calculate uptime
         uptime = (datetime.now() - app_start_time).total_seconds()
         
@@ -229,35 +292,46 @@ def health_check():
             'uptime_seconds': int(uptime)
         }
         
-        return jsonify(response)
+        return _json_response(response)
         
     except Exception as e:
         logger.error(f"Error in health check: {e}")
-        return jsonify({
+        return _json_response({
             'status': 'unhealthy',
             'error': str(e)
-        }), 500
-    finally:
-        if db:
-            db.close()
+        }, status=500)
 
 
 @app.errorhandler(404)
 def not_found(error):
     """Handle 404 errors."""
-    return jsonify({'error': 'Not found'}), 404
+    return _json_response({'error': 'Not found'}, status=404)
 
 
 @app.errorhandler(500)
 def internal_error(error):
     """Handle 500 errors."""
-    return jsonify({'error': 'Internal server error'}), 500
+    return _json_response({'error': 'Internal server error'}, status=500)
 
 
 def run_server():
-    """Run the Flask development server."""
+    """
+    Run the API server.
+
+    Serves through waitress, a threaded production WSGI server -
+    Werkzeug's dev server handles one request at a time, so a single
+    slow endpoint would stall health checks and the dashboard alike.
+    The pooled, check_same_thread=False connections already support
+    multi-threaded request handling.
+    """
     logger.info(f"Starting API server on {API_HOST}:{API_PORT}")
-    app.run(host=API_HOST, port=API_PORT, debug=False)
+    try:
+        from waitress import serve
+    except ImportError:
+        logger.warning("waitress not installed, falling back to the Flask dev server")
+        app.run(host=API_HOST, port=API_PORT, debug=False, threaded=True)
+        return
+    serve(app, host=API_HOST, port=API_PORT, threads=8)
 
 
 if __name__ == '__main__':
@@ -7,14 +7,39 @@ Author: Financial Dashboard Pipeline
 Date: 2025-11-26
 """
 
+import email.utils
 import feedparser
+import html
 import logging
+import re
+import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from typing import List, Dict
 from dateutil import parser as date_parser
+from lxml import etree
 
 logger = logging.getLogger(__name__)
 
+# Precompiled XPath selectors for the RSS fast path - only these fields
+# are ever read per <item>, so a full feedparser parse (pure-Python SAX)
+# is wasted work on well-formed RSS
+_XML_PARSER = etree.XMLParser(recover=True, huge_tree=False)
+_ITEM_TITLE = etree.XPath('string(title)')
+_ITEM_LINK = etree.XPath('string(link)')
+_ITEM_DESCRIPTION = etree.XPath('string(description)')
+_ITEM_PUBDATE = etree.XPath('string(pubDate)')
+
+# Strips any tag in one C-level pass instead of one str.replace per
+# known tag (which only ever covered <p>)
+_TAG_RE = re.compile(r'<[^>]+>')
+
+
+def _clean_description(description: str) -> str:
+    """Strip HTML tags, decode entities and cap the length."""
+    description = _TAG_RE.sub('', description)
+    return html.unescape(description).strip()[:500]
+
 
 class NewsCollector:
     """
@@ -35,6 +60,12 @@ class NewsCollector:
             rss_feeds: Dict mapping source names to RSS URLs
         """
         self.rss_feeds = rss_feeds
+        # Shared session reuses HTTP connections across feeds and cycles
+        self._session = requests.Session()
+        # Per-feed validators for conditional GETs - unchanged feeds come
+        # back as a bodyless 304 between collection cycles
+        self._etags: Dict[str, str] = {}
+        self._last_modified: Dict[str, str] = {}
     
     def collect_news(self, limit: int = 10) -> List[Dict]:
         """
@@ -42,56 +73,164 @@ class NewsCollector:
         
         Args:
             limit: Maximum number of articles per feed
-            
+
         Returns:
-            List of news article dicts
+            List of news article dicts; empty when every feed answered
+            304 Not Modified (a normal quiet cycle, not a failure)
         """
         all_news = []
-        
-        for source_name, feed_url in self.rss_feeds.items():
-            try:
-                logger.info(f"Fetching news from {source_name}")
-                news_items = self._parse_feed(source_name, feed_url, limit)
-                all_news.extend(news_items)
-                logger.info(f"Collected {len(news_items)} articles from {source_name}")
-            except Exception as e:
-                logger.error(f"Error fetching from {source_name}: {e}")
-                # Continue with other feeds
-        
-        if not all_news:
+        failures = 0
+
+        if not self.rss_feeds:
             raise Exception("Failed to collect news from any RSS feed")
-        
+
+        # Fetch all feeds concurrently - each fetch is dominated by the
+        # blocking HTTP GET inside feedparser, so wall time drops from the
+        # sum of feed latencies to roughly the slowest one. Per-feed
+        # failures are still logged and skipped, as in the serial loop.
+        with ThreadPoolExecutor(max_workers=min(16, len(self.rss_feeds))) as executor:
+            futures = {
+                executor.submit(self._parse_feed, source_name, feed_url, limit): source_name
+                for source_name, feed_url in self.rss_feeds.items()
+            }
+            for future in as_completed(futures):
+                source_name = futures[future]
+                try:
+                    news_items = future.result()
+                    all_news.extend(news_items)
+                    logger.info(f"Collected {len(news_items)} articles from {source_name}")
+                except Exception as e:
+                    failures += 1
+                    logger.error(f"Error fetching from {source_name}: {e}")
+                    # Continue with other feeds
+
+        # Only raise when every fetch actually failed - feeds that came
+        # back 304 Not Modified succeeded, they just had nothing new
+        if failures == len(self.rss_feeds):
+            raise Exception("Failed to collect news from any RSS feed")
+
         logger.info(f"Total articles collected: {len(all_news)}")
         return all_news
     
     def _parse_feed(self, source_name: str, feed_url: str, limit: int) -> List[Dict]:
         """
         Parse a single RSS feed.
-        
+
+        Fetches with the shared session and parses plain RSS with lxml
+        (C-based, much faster than feedparser's pure-Python parser).
+        Feeds without <item> elements (e.g. Atom) fall back to feedparser.
+
         Args:
             source_name: Name of the source
             feed_url: RSS feed URL
             limit: Max articles to extract
-            
+
         Returns:
             List of article dicts
         """
-        feed = feedparser.parse(feed_url)
-        
+        headers = {}
+        if source_name in self._etags:
+            headers['If-None-Match'] = self._etags[source_name]
+        if source_name in self._last_modified:
+            headers['If-Modified-Since'] = self._last_modified[source_name]
+
+        response = self._session.get(feed_url, headers=headers, timeout=10)
+        if response.status_code == 304:
+            logger.info(f"Feed {source_name} unchanged (304), skipping parse")
+            return []
+        response.raise_for_status()
+
+        if 'ETag' in response.headers:
+            self._etags[source_name] = response.headers['ETag']
+        if 'Last-Modified' in response.headers:
+            self._last_modified[source_name] = response.headers['Last-Modified']
+
+        root = etree.fromstring(response.content, parser=_XML_PARSER)
+        items = root.iter('item') if root is not None else iter(())
+
+        articles = []
+        for item in items:
+            if len(articles) >= limit:
+                break
+            try:
+                article = self._extract_item_data(item, source_name)
+                articles.append(article)
+            except Exception as e:
+                logger.error(f"Error extracting article from {source_name}: {e}")
+
+        if not articles:
+            # Not recognizable as plain RSS - let feedparser have a go
+            return self._parse_feed_fallback(source_name, response.content, limit)
+
+        return articles
+
+    def _parse_feed_fallback(self, source_name: str, content: bytes, limit: int) -> List[Dict]:
+        """
+        Parse feed content with feedparser (non-RSS or malformed feeds).
+
+        Args:
+            source_name: Name of the source
+            content: Raw feed bytes
+            limit: Max articles to extract
+
+        Returns:
+            List of article dicts
+        """
+        feed = feedparser.parse(content)
+
         if feed.bozo:
             logger.warning(f"Feed {source_name} has parsing issues: {feed.bozo_exception}")
-        
+
         articles = []
-        
+
         for entry in feed.entries[:limit]:
             try:
                 article = self._extract_article_data(entry, source_name)
                 articles.append(article)
             except Exception as e:
                 logger.error(f"Error extracting article from {source_name}: {e}")
-        
+
         return articles
-    
+
+    def _extract_item_data(self, item, source: str) -> Dict:
+        """
+        Extract article data from an lxml RSS <item> element.
+
+        Args:
+            item: lxml element for the <item>
+            source: Source name
+
+        Returns:
+            Article data dict
+        """
+        title = (_ITEM_TITLE(item) or 'No title').strip()
+        link = _ITEM_LINK(item).strip()
+
+        description = _ITEM_DESCRIPTION(item)
+        description = _clean_description(description) if description else ''
+
+        published_date = None
+        published = _ITEM_PUBDATE(item)
+        if published:
+            # RFC 822 dates (the RSS norm) parse via the stdlib; anything
+            # else goes through dateutil as before
+            try:
+                published_date = email.utils.parsedate_to_datetime(published)
+            except (TypeError, ValueError):
+                try:
+                    published_date = date_parser.parse(published)
+                except Exception:
+                    pass
+
+        return {
+            'title': title,
+            'link': link,
+            'source': source,
+            'description': description,
+            'published_date': published_date
+        }
+
+
     def _extract_article_data(self, entry, source: str) -> Dict:
         """
         Extract article data from RSS entry.
@@ -112,9 +251,7 @@ class NewsCollector:
         # Extract description
         description = entry.get('summary', entry.get('description', ''))
         if description:
-            # Remove HTML tags (basic)
-            description = description.replace('<p>', '').replace('</p>', '')
-            description = description.strip()[:500]  # Limit length
+            description = _clean_description(description)
         
         # Extract published date
         published_date = None
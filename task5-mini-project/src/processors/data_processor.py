@@ -11,6 +11,8 @@ import logging
 from datetime import datetime
 from typing import Dict, List, Optional
 
+import numpy as np
+
 logger = logging.getLogger(__name__)
 
 
@@ -24,39 +26,60 @@ class DataProcessor:
     - Data normalization
     """
     
-    def process_exchange_rates(self, rates: Dict[str, float], 
-                               previous_rates: Optional[Dict[str, float]] = None) -> List[Dict]:
+    def process_exchange_rates(self, rates: Dict[str, float],
+                               previous_rates: Optional[Dict[str, float]] = None,
+                               timestamp: Optional[datetime] = None) -> List[Dict]:
         """
         Process exchange rates.
-        
+
         Args:
             rates: Current rates dict
             previous_rates: Previous rates for change calculation
-            
+            timestamp: Timestamp to record on each rate; defaults to now
+
         Returns:
             List of processed rate dicts
         """
-        processed = []
-        timestamp = datetime.now()
-        
+        if timestamp is None:
+            timestamp = datetime.now()
+        # Format the shared timestamp once; every row references the same
+        # string, so neither orjson nor the sqlite adapter re-serializes
+        # the datetime per row
+        ts_iso = timestamp.isoformat(sep=' ', timespec='seconds')
+
+        # Validate first, then compute all daily changes in one vectorized
+        # pass instead of a Python float expression per currency
+        codes = []
+        values = []
         for currency_code, rate in rates.items():
-            # Validate
             if not self.validate_rate_data({'currency_code': currency_code, 'rate': rate}):
                 logger.warning(f"Invalid rate data for {currency_code}, skipping")
                 continue
-            
-            # Calculate daily change
-            daily_change = None
-            if previous_rates and currency_code in previous_rates:
-                daily_change = self.calculate_daily_change(rate, previous_rates[currency_code])
-            
-            processed.append({
-                'currency_code': currency_code,
+            codes.append(currency_code)
+            values.append(rate)
+
+        if previous_rates:
+            current = np.fromiter(values, dtype=np.float64, count=len(values))
+            previous = np.array([previous_rates.get(code, np.nan) for code in codes],
+                                dtype=np.float64)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                changes = np.round((current - previous) / previous, 6)
+            # Mirror calculate_daily_change: a zero previous rate means no
+            # meaningful change (0.0); a missing one stays None (NaN here)
+            changes = np.where(previous == 0, 0.0, changes)
+        else:
+            changes = np.full(len(codes), np.nan)
+
+        processed = [
+            {
+                'currency_code': code,
                 'rate': rate,
-                'timestamp': timestamp,
-                'daily_change': daily_change
-            })
-        
+                'timestamp': ts_iso,
+                'daily_change': None if np.isnan(change) else float(change)
+            }
+            for code, rate, change in zip(codes, values, changes)
+        ]
+
         logger.info(f"Processed {len(processed)} exchange rates")
         return processed
     
@@ -147,18 +170,15 @@ class DataProcessor:
         Returns:
             True if valid
         """
-        # Check required fields
-        required = ['title', 'link', 'source']
-        for field in required:
-            if field not in data or not data[field]:
-                return False
-        
-        # Check title length
-        if len(data['title']) < 5:
-            return False
-        
-        # Check link format
-        if not data['link'].startswith('http'):
-            return False
-        
-        return True
+        # Bind the fields once and short-circuit in one expression - this
+        # runs per article across batches of hundreds, so the per-field
+        # dict lookups and loop dispatch add up. The startswith tuple is a
+        # single C call covering both schemes.
+        title = data.get('title')
+        link = data.get('link')
+        source = data.get('source')
+        return bool(
+            title and link and source
+            and len(title) >= 5
+            and link.startswith(('http://', 'https://'))
+        )
@@ -0,0 +1,73 @@
+"""
+Connection Pool
+
+Bounded pool of reusable Database connections.
+
+Author: Financial Dashboard Pipeline
+Date: 2025-11-26
+"""
+
+import logging
+import queue
+from contextlib import contextmanager
+
+from .database import Database
+
+logger = logging.getLogger(__name__)
+
+
+class ConnectionPool:
+    """
+    Bounded LIFO pool of reusable Database connections.
+
+    Opening sqlite per use pays the file open, pragma replay and
+    page-cache warm-up every time; the pool keeps connections alive and
+    hands the most recently used (cache-warm) one out first.
+    Connections are created lazily, opened with check_same_thread=False
+    so they can move between threads (each is used by one thread at a
+    time while checked out).
+    """
+
+    def __init__(self, db_path: str, size: int = 8, **db_kwargs):
+        """
+        Initialize the pool.
+
+        Args:
+            db_path: Path to SQLite database file
+            size: Maximum number of pooled connections
+            db_kwargs: Extra keyword arguments forwarded to Database
+        """
+        self.db_path = db_path
+        self.size = size
+        self._db_kwargs = db_kwargs
+        self._pool = queue.LifoQueue(maxsize=size)
+
+    @contextmanager
+    def checkout(self):
+        """
+        Borrow a Database from the pool, returning it afterwards.
+
+        Yields a connected Database; overflow connections beyond the
+        pool size are closed instead of pooled.
+        """
+        try:
+            db = self._pool.get_nowait()
+        except queue.Empty:
+            db = Database(self.db_path, check_same_thread=False,
+                          **self._db_kwargs)
+            db.connect()
+        try:
+            yield db
+        finally:
+            try:
+                self._pool.put_nowait(db)
+            except queue.Full:
+                db.close()
+
+    def close_all(self):
+        """Close every pooled connection."""
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
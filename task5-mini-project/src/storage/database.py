@@ -9,12 +9,63 @@ Date: 2025-11-26
 
 import sqlite3
 import logging
+from contextlib import contextmanager
 from datetime import datetime
-from typing import List, Dict, Optional, Any
+from typing import Iterator, List, Dict, Optional, Any
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+# Datetimes still passed to the DB layer are stored as ISO text via an
+# explicit adapter (the implicit default adapter is deprecated and does a
+# per-row registry lookup); processed rates arrive pre-formatted as text
+sqlite3.register_adapter(
+    datetime, lambda value: value.isoformat(sep=' ', timespec='seconds'))
+
+# Full schema as one script - executescript parses and applies it in a
+# single round instead of one execute per statement
+_SCHEMA_SQL = '''
+    CREATE TABLE IF NOT EXISTS exchange_rates (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        currency_code TEXT NOT NULL,
+        rate REAL NOT NULL,
+        base_currency TEXT DEFAULT 'BGN',
+        timestamp DATETIME NOT NULL,
+        daily_change REAL,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE(currency_code, timestamp)
+    );
+
+    CREATE TABLE IF NOT EXISTS news (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        title TEXT NOT NULL,
+        description TEXT,
+        link TEXT UNIQUE NOT NULL,
+        source TEXT NOT NULL,
+        published_date DATETIME,
+        fetched_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    );
+
+    CREATE TABLE IF NOT EXISTS metadata (
+        metadata_key TEXT PRIMARY KEY,
+        metadata_value TEXT NOT NULL,
+        updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    );
+
+    -- Indexes for the hot query predicates: timestamp-range scans in
+    -- get_rate_history / get_latest_rates, the per-currency lookback in
+    -- get_previous_rate(s), and the ORDER BY ... LIMIT in
+    -- get_recent_news (which otherwise sorts the whole table)
+    CREATE INDEX IF NOT EXISTS idx_rates_ts
+    ON exchange_rates(timestamp DESC);
+
+    CREATE INDEX IF NOT EXISTS idx_rates_cur_ts
+    ON exchange_rates(currency_code, timestamp DESC);
+
+    CREATE INDEX IF NOT EXISTS idx_news_pub
+    ON news(published_date DESC, fetched_at DESC);
+'''
+
 
 class Database:
     """
@@ -23,29 +74,76 @@ class Database:
     Provides connection management and CRUD operations.
     """
     
-    def __init__(self, db_path: str):
+    def __init__(self, db_path: str, check_same_thread: bool = True,
+                 pragmas: Optional[Dict[str, str]] = None):
         """
         Initialize database connection.
-        
+
         Args:
             db_path: Path to SQLite database file
+            check_same_thread: Passed to sqlite3.connect; set False for
+                connections shared across threads via a pool
+            pragmas: Extra PRAGMA overrides applied after the defaults,
+                e.g. relaxed durability settings for throwaway test
+                databases; never set these on production data
         """
         self.db_path = db_path
         self.conn = None
-        
+        self.check_same_thread = check_same_thread
+        self.pragmas = pragmas
+
         # Ensure data directory exists
         Path(db_path).parent.mkdir(parents=True, exist_ok=True)
-    
+
+    @classmethod
+    def wrap(cls, conn: sqlite3.Connection, db_path: str = ':memory:') -> 'Database':
+        """
+        Wrap an externally created sqlite3 connection.
+
+        For callers that prepare the connection themselves (e.g. test
+        fixtures cloning a template via the backup API). The wrapped
+        connection is adopted as-is apart from enabling Row access.
+
+        Args:
+            conn: An open sqlite3 connection
+            db_path: Path recorded for reference
+
+        Returns:
+            Database using the given connection
+        """
+        database = cls(db_path)
+        conn.row_factory = sqlite3.Row
+        database.conn = conn
+        return database
+
     def connect(self) -> sqlite3.Connection:
         """
         Create database connection.
-        
+
         Returns:
             SQLite connection object
         """
         if self.conn is None:
-            self.conn = sqlite3.connect(self.db_path)
+            # cached_statements keeps compiled statements keyed by SQL
+            # text, so the fixed query strings used by the insert/select
+            # helpers skip re-parsing and re-planning on every call
+            self.conn = sqlite3.connect(self.db_path,
+                                        check_same_thread=self.check_same_thread,
+                                        cached_statements=128)
             self.conn.row_factory = sqlite3.Row  # Enable column access by name
+
+            # WAL lets the API serve reads while the scheduler writes, and
+            # synchronous=NORMAL halves fsyncs (WAL stays durable across
+            # crashes, losing at most the last unsynced transactions)
+            self.conn.execute('PRAGMA journal_mode=WAL')
+            self.conn.execute('PRAGMA synchronous=NORMAL')
+            self.conn.execute('PRAGMA temp_store=MEMORY')
+            self.conn.execute('PRAGMA mmap_size=268435456')
+            self.conn.execute('PRAGMA cache_size=-32768')  # 32 MiB page cache
+
+            if self.pragmas:
+                for key, value in self.pragmas.items():
+                    self.conn.execute(f'PRAGMA {key}={value}')
         return self.conn
     
     def close(self):
@@ -54,47 +152,31 @@ class Database:
             self.conn.close()
             self.conn = None
     
+    @contextmanager
+    def transaction(self):
+        """
+        Group several statements into one explicit transaction.
+
+        Opens a BEGIN IMMEDIATE transaction, commits on success and
+        rolls back on error - one journal fsync for the whole block
+        instead of one per statement. Yields the connection so callers
+        can execute statements directly; note that the high-level
+        insert_* helpers commit themselves, which ends the transaction
+        early.
+        """
+        conn = self.connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+        except Exception:
+            conn.rollback()
+            raise
+        conn.commit()
+
     def init_database(self):
-        """Create database tables if they don't exist."""
+        """Create database tables and indexes if they don't exist."""
         conn = self.connect()
-        cursor = conn.cursor()
-        
-        # Exchange rates table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS exchange_rates (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                currency_code TEXT NOT NULL,
-                rate REAL NOT NULL,
-                base_currency TEXT DEFAULT 'BGN',
-                timestamp DATETIME NOT NULL,
-                daily_change REAL,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(currency_code, timestamp)
-            )
-        ''')
-        
-        # News table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS news (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                title TEXT NOT NULL,
-                description TEXT,
-                link TEXT UNIQUE NOT NULL,
-                source TEXT NOT NULL,
-                published_date DATETIME,
-                fetched_at DATETIME DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Metadata table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS metadata (
-                metadata_key TEXT PRIMARY KEY,
-                metadata_value TEXT NOT NULL,
-                updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
+        conn.executescript(_SCHEMA_SQL)
         conn.commit()
         logger.info("Database initialized successfully")
     
@@ -150,9 +232,31 @@ class Database:
         cursor = conn.cursor()
         cursor.execute(query, params)
         rows = cursor.fetchall()
-        
+
         return [dict(row) for row in rows]
-    
+
+    def iter_rows(self, query: str, params: tuple = ()) -> Iterator[sqlite3.Row]:
+        """
+        Execute a SELECT query and yield rows one by one.
+
+        Streaming counterpart to fetch_all for callers that scan the
+        result once - skips materializing the full list and the
+        per-row dict() copy (sqlite3.Row already supports key access).
+        The iterator must be consumed before the connection is reused.
+
+        Args:
+            query: SQL SELECT query
+            params: Query parameters
+
+        Yields:
+            sqlite3.Row objects
+        """
+        cursor = self.connect().cursor()
+        cursor.execute(query, params)
+        cursor.arraysize = 256
+        yield from cursor
+
+
     # Exchange Rate Operations
     
     def insert_exchange_rate(self, currency_code: str, rate: float, timestamp: datetime, 
@@ -166,6 +270,35 @@ class Database:
         self.execute(query, (currency_code, rate, base_currency, timestamp, daily_change))
         logger.debug(f"Inserted rate: {currency_code} = {rate}")
     
+    def insert_exchange_rates_many(self, rates: List[Dict]) -> int:
+        """
+        Insert a batch of exchange rate records in one transaction.
+
+        Args:
+            rates: List of processed rate dicts (currency_code, rate,
+                   timestamp, daily_change)
+
+        Returns:
+            Number of affected rows
+        """
+        if not rates:
+            return 0
+        query = '''
+            INSERT OR REPLACE INTO exchange_rates
+            (currency_code, rate, base_currency, timestamp, daily_change)
+            VALUES (?, ?, ?, ?, ?)
+        '''
+        conn = self.connect()
+        cursor = conn.cursor()
+        cursor.executemany(query, [
+            (r['currency_code'], r['rate'], r.get('base_currency', 'BGN'),
+             r['timestamp'], r.get('daily_change'))
+            for r in rates
+        ])
+        conn.commit()
+        logger.debug(f"Inserted {len(rates)} exchange rates in one batch")
+        return cursor.rowcount
+
     def get_latest_rates(self) -> List[Dict]:
         """Get most recent exchange rates for all currencies."""
         query = '''
@@ -178,24 +311,50 @@ class Database:
         '''
         return self.fetch_all(query)
     
-    def get_rate_history(self, days: int = 7) -> List[Dict]:
+    def get_rate_history(self, days: int = 7, group_by_date: bool = False) -> List[Dict]:
         """
         Get historical exchange rates.
-        
+
         Args:
             days: Number of days of history
-            
+            group_by_date: Aggregate to one row per (date, currency),
+                averaged over the day's ticks and pre-sorted by date
+                descending - saves the caller from regrouping in Python
+
         Returns:
             List of rate records
         """
-        query = '''
-            SELECT currency_code, rate, daily_change, 
+        return self.fetch_all(self._rate_history_query(group_by_date), (days,))
+
+    def iter_rate_history(self, days: int = 7,
+                          group_by_date: bool = False) -> Iterator[sqlite3.Row]:
+        """
+        Streaming variant of get_rate_history.
+
+        Yields sqlite3.Row objects directly, for callers that scan the
+        history once without needing dict copies.
+        """
+        return self.iter_rows(self._rate_history_query(group_by_date), (days,))
+
+    @staticmethod
+    def _rate_history_query(group_by_date: bool) -> str:
+        """Build the history SELECT, aggregated per day or raw ticks."""
+        if group_by_date:
+            return '''
+                SELECT DATE(timestamp) as date, currency_code,
+                       AVG(rate) as rate, AVG(daily_change) as daily_change
+                FROM exchange_rates
+                WHERE timestamp >= datetime('now', '-' || ? || ' days')
+                GROUP BY date, currency_code
+                ORDER BY date DESC, currency_code
+            '''
+        return '''
+            SELECT currency_code, rate, daily_change,
                    DATE(timestamp) as date
             FROM exchange_rates
             WHERE timestamp >= datetime('now', '-' || ? || ' days')
             ORDER BY timestamp DESC, currency_code
         '''
-        return self.fetch_all(query, (days,))
     
     def get_previous_rate(self, currency_code: str) -> Optional[float]:
         """
@@ -217,6 +376,38 @@ class Database:
         result = self.fetch_one(query, (currency_code,))
         return result['rate'] if result else None
     
+    def get_previous_rates(self, currency_codes: List[str]) -> Dict[str, float]:
+        """
+        Get the rates from 24 hours ago for several currencies in one query.
+
+        Batch counterpart to get_previous_rate - one round-trip instead of
+        one query per tracked currency.
+
+        Args:
+            currency_codes: Currency codes to look up
+
+        Returns:
+            Dict mapping currency code to its rate from 24 hours ago;
+            currencies without history are absent
+        """
+        if not currency_codes:
+            return {}
+        placeholders = ','.join('?' * len(currency_codes))
+        query = f'''
+            SELECT e.currency_code, e.rate
+            FROM exchange_rates e
+            JOIN (
+                SELECT currency_code, MAX(timestamp) AS ts
+                FROM exchange_rates
+                WHERE timestamp <= datetime('now', '-24 hours')
+                AND currency_code IN ({placeholders})
+                GROUP BY currency_code
+            ) latest
+            ON e.currency_code = latest.currency_code AND e.timestamp = latest.ts
+        '''
+        rows = self.fetch_all(query, tuple(currency_codes))
+        return {row['currency_code']: row['rate'] for row in rows}
+
     # News Operations
     
     def insert_news(self, title: str, link: str, source: str, 
@@ -233,6 +424,34 @@ class Database:
             logger.debug(f"Inserted news: {title[:50]}...")
         return rows_affected
     
+    def insert_news_many(self, articles: List[Dict]) -> int:
+        """
+        Insert a batch of news articles in one transaction (ignores duplicates).
+
+        Args:
+            articles: List of processed article dicts
+
+        Returns:
+            Number of newly inserted rows
+        """
+        if not articles:
+            return 0
+        query = '''
+            INSERT OR IGNORE INTO news
+            (title, description, link, source, published_date)
+            VALUES (?, ?, ?, ?, ?)
+        '''
+        conn = self.connect()
+        cursor = conn.cursor()
+        cursor.executemany(query, [
+            (a['title'], a.get('description'), a['link'], a['source'],
+             a.get('published_date'))
+            for a in articles
+        ])
+        conn.commit()
+        logger.debug(f"Inserted {cursor.rowcount} new articles in one batch")
+        return cursor.rowcount
+
     def get_recent_news(self, limit: int = 10) -> List[Dict]:
         """
         Get recent news articles.
@@ -265,6 +484,27 @@ class Database:
         """Get metadata value by key."""
         result = self.fetch_one('SELECT metadata_value FROM metadata WHERE metadata_key = ?', (key,))
         return result['metadata_value'] if result else None
+
+    def get_metadata_many(self, keys) -> Dict[str, str]:
+        """
+        Get several metadata values in one query.
+
+        Args:
+            keys: Metadata keys to look up
+
+        Returns:
+            Dict mapping key to value; missing keys are absent
+        """
+        keys = tuple(keys)
+        if not keys:
+            return {}
+        placeholders = ','.join('?' * len(keys))
+        rows = self.fetch_all(
+            f'SELECT metadata_key, metadata_value FROM metadata '
+            f'WHERE metadata_key IN ({placeholders})',
+            keys
+        )
+        return {row['metadata_key']: row['metadata_value'] for row in rows}
     
     def __enter__(self):
         """Context manager entry."""
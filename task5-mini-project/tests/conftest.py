@@ -0,0 +1,113 @@
+"""
+Shared Test Fixtures
+
+The database fixtures use private :memory: connections (not shared-cache
+URIs), so every test - and every pytest-xdist worker under -n auto -
+gets its own isolated database with nothing to contend on.
+
+Author: Financial Dashboard Pipeline
+Date: 2025-11-26
+"""
+
+import pytest
+import sys
+from datetime import datetime
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import sqlite3
+
+from src.collectors.exchange_rate_collector import ExchangeRateCollector
+from src.collectors.news_collector import NewsCollector
+from src.processors.data_processor import DataProcessor
+from src.storage.database import Database, _SCHEMA_SQL
+
+# Durability is irrelevant for throwaway test databases - skip the
+# journal and fsyncs entirely. These never apply to production connects.
+TEST_PRAGMAS = {
+    'journal_mode': 'MEMORY',
+    'synchronous': 'OFF',
+    'temp_store': 'MEMORY',
+}
+
+
+@pytest.fixture(scope='session')
+def now():
+    """Frozen timestamp shared by insert tests - one constant instead of
+    a datetime.now() call per row, and assertions on stored values stay
+    deterministic."""
+    return datetime(2025, 11, 26, 12, 0, 0)
+
+
+@pytest.fixture(scope='session')
+def processor():
+    """Shared DataProcessor - it holds no state, one instance suffices."""
+    return DataProcessor()
+
+
+@pytest.fixture(scope='module')
+def rate_collector():
+    """Shared ExchangeRateCollector - constructing one builds a pooled
+    requests.Session, which the pure validation tests don't need to
+    repeat per test."""
+    return ExchangeRateCollector(
+        api_url='https://example.com',
+        tracked_currencies=['EUR', 'USD']
+    )
+
+
+@pytest.fixture(scope='module')
+def news_collector():
+    """Shared NewsCollector, likewise carrying a requests.Session."""
+    return NewsCollector(rss_feeds={})
+
+
+@pytest.fixture(scope='session')
+def template_db():
+    """Schema-only in-memory template the db fixture clones from."""
+    conn = sqlite3.connect(':memory:')
+    conn.executescript(_SCHEMA_SQL)
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def db(template_db):
+    """
+    In-memory database cloned from the schema template.
+
+    The backup API copies the template's pages directly, so each test
+    gets a fresh database without re-parsing the DDL, and nothing
+    touches the filesystem. Use this for tests that write.
+    """
+    conn = sqlite3.connect(':memory:')
+    template_db.backup(conn)
+    database = Database.wrap(conn)
+    yield database
+    database.close()
+
+
+@pytest.fixture(scope='session')
+def seeded_db():
+    """
+    Shared read-only database seeded with one rate and one article.
+
+    Built once per session so read-path tests don't each repeat the
+    schema DDL and seed inserts. Tests using it must not write.
+    """
+    database = Database(':memory:', pragmas=TEST_PRAGMAS)
+    database.init_database()
+    database.insert_exchange_rate(
+        currency_code='EUR',
+        rate=0.5113,
+        timestamp=datetime.now()
+    )
+    database.insert_news(
+        title='Seeded News',
+        link='https://example.com/seeded',
+        source='test'
+    )
+    yield database
+    database.close()
@@ -6,18 +6,23 @@ Date: 2025-11-26
 """
 
 import pytest
-import sys
-from pathlib import Path
 from datetime import datetime
+from unittest.mock import ANY
 
-# Add src to path
-sys.path.insert(0, str(Path(__file__).parent.parent))
+# sys.path is set up once in conftest.py, which pytest imports before
+# any test module
 
 from src.storage.database import Database
+from src.storage.connection_pool import ConnectionPool
 from src.processors.data_processor import DataProcessor
 from src.collectors.exchange_rate_collector import ExchangeRateCollector
 from src.collectors.news_collector import NewsCollector
 
+# Under pytest-xdist, schedule every test in this module on the same
+# worker so the session-scoped database fixtures are built once, not
+# once per worker
+pytestmark = pytest.mark.xdist_group("db")
+
 
 class TestDatabase:
     """Test database operations."""
@@ -31,29 +36,21 @@ class TestDatabase:
         assert db_path.exists()
         db.close()
     
-    def test_insert_exchange_rate(self, tmp_path):
+    def test_insert_exchange_rate(self, db, now):
         """Test inserting exchange rate."""
-        db = Database(str(tmp_path / "test.db"))
-        db.init_database()
-        
         db.insert_exchange_rate(
             currency_code='EUR',
             rate=0.5113,
-            timestamp=datetime.now()
+            timestamp=now
         )
         
         rates = db.get_latest_rates()
         assert len(rates) == 1
         assert rates[0]['currency_code'] == 'EUR'
         assert rates[0]['rate'] == 0.5113
-        
-        db.close()
-    
-    def test_insert_news(self, tmp_path):
+
+    def test_insert_news(self, db):
         """Test inserting news."""
-        db = Database(str(tmp_path / "test.db"))
-        db.init_database()
-        
         rows = db.insert_news(
             title='Test News',
             link='https://example.com/news1',
@@ -65,14 +62,9 @@ class TestDatabase:
         news = db.get_recent_news(limit=10)
         assert len(news) == 1
         assert news[0]['title'] == 'Test News'
-        
-        db.close()
-    
-    def test_duplicate_news_ignored(self, tmp_path):
+
+    def test_duplicate_news_ignored(self, db):
         """Test that duplicate news is ignored."""
-        db = Database(str(tmp_path / "test.db"))
-        db.init_database()
-        
         # Insert first time
         rows1 = db.insert_news(
             title='Test News',
@@ -89,106 +81,186 @@ class TestDatabase:
         
         assert rows1 == 1
         assert rows2 == 0  # Duplicate ignored
-        
-        db.close()
 
+    def test_bulk_insert_exchange_rates(self, db, now):
+        """Test batch-inserting rates through one executemany call."""
+        rows = [
+            {
+                'currency_code': f'C{i:04d}',
+                'rate': 1.0 + i,
+                'timestamp': now,
+                'daily_change': None
+            }
+            for i in range(1000)
+        ]
 
-class TestDataProcessor:
-    """Test data processor."""
-    
-    def test_validate_rate_data_valid(self):
-        """Test rate validation with valid data."""
-        processor = DataProcessor()
-        
-        data = {
+        inserted = db.insert_exchange_rates_many(rows)
+
+        assert inserted == 1000
+        assert db.conn.total_changes == 1000
+        assert len(db.get_latest_rates()) == 1000
+
+    def test_bulk_insert_news(self, db):
+        """Test batch-inserting news, counting only new rows."""
+        articles = [
+            {
+                'title': f'Bulk News {i}',
+                'link': f'https://example.com/bulk/{i}',
+                'source': 'test'
+            }
+            for i in range(100)
+        ]
+
+        assert db.insert_news_many(articles) == 100
+        # Re-inserting the same batch is ignored wholesale
+        assert db.insert_news_many(articles) == 0
+
+    def test_bulk_insert_does_not_loop_single_inserts(self, db, now, monkeypatch):
+        """Regression guard: the bulk path must not fall back to per-row inserts."""
+        def fail(*args, **kwargs):
+            raise AssertionError("bulk insert called the per-row method")
+
+        monkeypatch.setattr(db, 'insert_exchange_rate', fail)
+        monkeypatch.setattr(db, 'insert_news', fail)
+
+        db.insert_exchange_rates_many([{
             'currency_code': 'EUR',
-            'rate': 0.5113
-        }
-        
-        assert processor.validate_rate_data(data) is True
-    
-    def test_validate_rate_data_invalid(self):
-        """Test rate validation with invalid data."""
-        processor = DataProcessor()
-        
-        # Missing fields
-        assert processor.validate_rate_data({}) is False
-        
-        # Invalid currency code
-        assert processor.validate_rate_data({'currency_code': 'EU', 'rate': 0.5}) is False
-        
-        # Negative rate
-        assert processor.validate_rate_data({'currency_code': 'EUR', 'rate': -0.5}) is False
-    
-    def test_validate_news_data_valid(self):
-        """Test news validation with valid data."""
-        processor = DataProcessor()
-        
-        data = {
-            'title': 'Test News Article',
-            'link': 'https://example.com/news',
-            'source': 'test'
-        }
-        
-        assert processor.validate_news_data(data) is True
-    
-    def test_validate_news_data_invalid(self):
-        """Test news validation with invalid data."""
-        processor = DataProcessor()
-        
-        # Missing fields
-        assert processor.validate_news_data({}) is False
-        
-        # Short title
-        assert processor.validate_news_data({
-            'title': 'Hi',
-            'link': 'https://example.com',
-            'source': 'test'
-        }) is False
-        
-        # Invalid link
-        assert processor.validate_news_data({
-            'title': 'Test News',
-            'link': 'not-a-url',
+            'rate': 0.5113,
+            'timestamp': now,
+            'daily_change': None
+        }])
+        db.insert_news_many([{
+            'title': 'Guard News',
+            'link': 'https://example.com/guard',
             'source': 'test'
-        }) is False
+        }])
+
+    def test_transaction_groups_inserts(self, db, now):
+        """Test committing several inserts as one transaction."""
+        with db.transaction() as conn:
+            conn.execute(
+                'INSERT INTO exchange_rates (currency_code, rate, timestamp) '
+                'VALUES (?, ?, ?)', ('EUR', 0.5113, now))
+            conn.execute(
+                'INSERT INTO exchange_rates (currency_code, rate, timestamp) '
+                'VALUES (?, ?, ?)', ('USD', 0.5556, now))
+
+        assert len(db.get_latest_rates()) == 2
+
+    def test_transaction_rolls_back_on_error(self, db, now):
+        """Test that a failing transaction leaves no partial writes."""
+        with pytest.raises(ValueError):
+            with db.transaction() as conn:
+                conn.execute(
+                    'INSERT INTO exchange_rates (currency_code, rate, timestamp) '
+                    'VALUES (?, ?, ?)', ('EUR', 0.5113, now))
+                raise ValueError('forced failure')
+
+        assert db.get_latest_rates() == []
+
+    def test_get_latest_rates(self, seeded_db):
+        """Test reading latest rates from the shared seeded database."""
+        rates = seeded_db.get_latest_rates()
+
+        assert len(rates) == 1
+        assert rates[0]['currency_code'] == 'EUR'
+        assert rates[0]['rate'] == 0.5113
+
+    def test_get_recent_news(self, seeded_db):
+        """Test reading recent news from the shared seeded database."""
+        news = seeded_db.get_recent_news(limit=10)
+
+        assert len(news) == 1
+        assert news[0]['title'] == 'Seeded News'
+
+
+class TestConnectionPool:
+    """Test the database connection pool."""
+
+    def test_checkout_reuses_connection(self, tmp_path):
+        """Test that a returned connection is handed out again."""
+        pool = ConnectionPool(str(tmp_path / "test.db"), size=2)
+
+        with pool.checkout() as db:
+            db.init_database()
+            first = db
+
+        with pool.checkout() as db:
+            assert db is first
+
+        pool.close_all()
+
+    def test_overflow_connections_are_closed(self, tmp_path):
+        """Test that connections beyond the pool size are not pooled."""
+        pool = ConnectionPool(str(tmp_path / "test.db"), size=1)
+
+        with pool.checkout() as outer:
+            outer.init_database()
+            with pool.checkout() as inner:
+                assert inner is not outer
+
+        # Exactly one connection fit back into the pool; the overflow
+        # one was closed on return
+        assert (inner.conn is None) != (outer.conn is None)
+
+        pool.close_all()
+
+
+class TestDataProcessor:
+    """Test data processor."""
     
-    def test_calculate_daily_change(self):
+    @pytest.mark.parametrize("data,expected", [
+        ({'currency_code': 'EUR', 'rate': 0.5113}, True),
+        ({}, False),                                      # Missing fields
+        ({'currency_code': 'EU', 'rate': 0.5}, False),    # Invalid currency code
+        ({'currency_code': 'EUR', 'rate': -0.5}, False),  # Negative rate
+    ])
+    def test_validate_rate_data(self, processor, data, expected):
+        """Test rate validation."""
+        assert processor.validate_rate_data(data) is expected
+
+    @pytest.mark.parametrize("data,expected", [
+        ({'title': 'Test News Article', 'link': 'https://example.com/news',
+          'source': 'test'}, True),
+        ({}, False),                                      # Missing fields
+        ({'title': 'Hi', 'link': 'https://example.com',
+          'source': 'test'}, False),                      # Short title
+        ({'title': 'Test News', 'link': 'not-a-url',
+          'source': 'test'}, False),                      # Invalid link
+    ])
+    def test_validate_news_data(self, processor, data, expected):
+        """Test news validation."""
+        assert processor.validate_news_data(data) is expected
+
+    @pytest.mark.parametrize("current,previous,expected", [
+        (1.05, 1.00, 0.05),   # Positive change
+        (0.95, 1.00, -0.05),  # Negative change
+        (1.00, 1.00, 0.0),    # No change
+    ])
+    def test_calculate_daily_change(self, processor, current, previous, expected):
         """Test daily change calculation."""
-        processor = DataProcessor()
-        
-        # Positive change
-        change = processor.calculate_daily_change(1.05, 1.00)
-        assert change == 0.05
-        
-        # Negative change
-        change = processor.calculate_daily_change(0.95, 1.00)
-        assert change == -0.05
-        
-        # No change
-        change = processor.calculate_daily_change(1.00, 1.00)
-        assert change == 0.0
-    
-    def test_process_exchange_rates(self):
+        assert processor.calculate_daily_change(current, previous) == expected
+
+    def test_process_exchange_rates(self, processor):
         """Test processing exchange rates."""
-        processor = DataProcessor()
-        
         rates = {
             'EUR': 0.5113,
             'USD': 0.5556
         }
-        
+
         processed = processor.process_exchange_rates(rates)
-        
-        assert len(processed) == 2
-        assert processed[0]['currency_code'] in ['EUR', 'USD']
-        assert 'timestamp' in processed[0]
-        assert 'daily_change' in processed[0]
+
+        # One structural comparison covers field presence and values;
+        # the generated timestamp matches anything
+        assert processed == [
+            {'currency_code': 'EUR', 'rate': 0.5113,
+             'timestamp': ANY, 'daily_change': None},
+            {'currency_code': 'USD', 'rate': 0.5556,
+             'timestamp': ANY, 'daily_change': None},
+        ]
     
-    def test_process_news(self):
+    def test_process_news(self, processor):
         """Test processing news."""
-        processor = DataProcessor()
-        
         news_items = [
             {
                 'title': 'Test News 1',
@@ -204,78 +276,89 @@ class TestDataProcessor:
         ]
         
         processed = processor.process_news(news_items)
-        
-        assert len(processed) == 2
-        assert processed[0]['source'] == 'test'  # Normalized to lowercase
-        assert processed[0]['description'] == 'Description'  # Trimmed
+
+        assert processed == [
+            {'title': 'Test News 1', 'link': 'https://example.com/1',
+             'source': 'test',  # Normalized to lowercase
+             'description': 'Description',  # Trimmed
+             'published_date': None},
+            {'title': 'Test News 2', 'link': 'https://example.com/2',
+             'source': 'test', 'description': None, 'published_date': None},
+        ]
 
 
 class TestExchangeRateCollector:
     """Test exchange rate collector."""
     
-    def test_validate_response_valid(self):
+    def test_validate_response_valid(self, rate_collector):
         """Test response validation with valid data."""
-        collector = ExchangeRateCollector(
-            api_url='https://example.com',
-            tracked_currencies=['EUR', 'USD']
-        )
-        
         data = {
             'rates': {
                 'EUR': 0.5113,
                 'USD': 0.5556
             }
         }
-        
-        assert collector._validate_response(data) is True
-    
-    def test_validate_response_invalid(self):
+
+        assert rate_collector._validate_response(data) is True
+
+    def test_validate_response_invalid(self, rate_collector):
         """Test response validation with invalid data."""
-        collector = ExchangeRateCollector(
-            api_url='https://example.com',
-            tracked_currencies=['EUR']
-        )
-        
         # Not a dict
-        assert collector._validate_response([]) is False
-        
+        assert rate_collector._validate_response([]) is False
+
         # Missing rates
-        assert collector._validate_response({}) is False
-        
+        assert rate_collector._validate_response({}) is False
+
         # Rates not a dict
-        assert collector._validate_response({'rates': []}) is False
+        assert rate_collector._validate_response({'rates': []}) is False
+
+
+# A feedparser entry is dict-like (get/__contains__), so a plain dict
+# stands in for one without a hand-rolled mock class
+_RSS_ENTRY = {
+    'title': 'Test Article',
+    'link': 'https://example.com/article',
+    'summary': '<p>Test description</p>'
+}
+
+
+@pytest.fixture(scope='module')
+def entries():
+    """Feed-sized batch of RSS entries, built once for the bulk test."""
+    return [
+        {
+            'title': f'T{i}',
+            'link': f'https://example.com/{i}',
+            'summary': '<p>d</p>'
+        }
+        for i in range(1000)
+    ]
 
 
 class TestNewsCollector:
     """Test news collector."""
-    
-    def test_extract_article_data(self):
+
+    def test_extract_article_data(self, news_collector):
         """Test extracting article data from RSS entry."""
-        collector = NewsCollector(rss_feeds={})
-        
-        # Mock RSS entry
-        class MockEntry:
-            def __init__(self):
-                self.data = {
-                    'title': 'Test Article',
-                    'link': 'https://example.com/article',
-                    'summary': '<p>Test description</p>'
-                }
-            
-            def get(self, key, default=None):
-                return self.data.get(key, default)
-            
-            def __contains__(self, key):
-                return key in self.data
-        
-        entry = MockEntry()
-        article = collector._extract_article_data(entry, 'test')
+        article = news_collector._extract_article_data(_RSS_ENTRY, 'test')
         
         assert article['title'] == 'Test Article'
         assert article['link'] == 'https://example.com/article'
         assert article['source'] == 'test'
         assert 'Test description' in article['description']
 
+    def test_extract_article_data_bulk(self, news_collector, entries):
+        """Test extraction over a feed-sized batch of entries."""
+        articles = [
+            news_collector._extract_article_data(entry, 'test')
+            for entry in entries
+        ]
+
+        assert len(articles) == 1000
+        assert articles[0]['title'] == 'T0'
+        assert articles[-1]['link'] == 'https://example.com/999'
+        assert all(article['description'] == 'd' for article in articles)
+
 
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])